@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+LAMMPS CPU and GPU Benchmark
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))  # mdbench
+
+from mdbench.engines import LammpsEngine
+from mdbench.runner import main, run_single, run_throughput
+
+ENGINE = LammpsEngine()
+BENCHMARK_JOBS = ENGINE.jobs
+
+
+def lammps_run(job, **kwargs):
+    """Run LAMMPS on a GPU or CPU"""
+    return run_single(ENGINE, job, **kwargs)
+
+
+def lammps_throughput(job, instances, **kwargs):
+    """Run several pinned copies of a LAMMPS job at once and report aggregate performance"""
+    return run_throughput(ENGINE, job, instances, **kwargs)
+
+
+if __name__ == "__main__":
+    main(ENGINE)
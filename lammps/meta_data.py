@@ -0,0 +1,6 @@
+meta_data = {
+    "benchmark_name": "PugetBench-Numeric LAMMPS",
+    "benchmark_version_major": "0",
+    "benchmark_version_minor": "1.0",
+    "upload_id": "",
+}
@@ -0,0 +1,9 @@
+"""
+Benchmark harness shared by the NAMD, GROMACS and LAMMPS engine scripts
+
+The engine scripts (gromacs/gromacs.py, namd-cpu/namd_cpu.py, ...) put the
+repository root on sys.path and import mdbench.engines and mdbench.runner,
+so every engine runs the same runner. The command line tools run as
+modules from the repository root, e.g.
+python -m mdbench.results_store compare.
+"""
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Declarative benchmark campaigns with a time-aware schedule
+
+A spec file (TOML, or JSON) lists matrices of jobs x cores x gpus x
+instances x launch configs, e.g.
+
+    [defaults]
+    repeats = 3
+
+    [[matrix]]
+    jobs = ["apoa1", "stmv"]
+    cores = [1, 2, 4, 8, 16, 32, 64]
+
+    [[matrix]]
+    jobs = ["PEP"]
+    cores = 16
+    gpus = ["0", "0,1"]
+    config = [{}, {nb = "gpu", pme = "gpu"}]
+
+Every combination is a unit, one job result. Units run coarse to fine: all
+of them at the largest core count, then the smallest, then the core counts
+bisecting those, so a rough scaling curve exists early. The run time of
+each unit is estimated from earlier results of the same host, scaled by
+core count and steps, and corrected as units finish to give a live ETA.
+
+With --interleave the repeats of all the units run in randomized blocks
+instead: block b holds repeat b of every unit, shuffled with a recorded
+seed, so slow drift (heat soak, daemons, fragmentation) is spread over all
+the units rather than biasing whichever run last.
+"""
+
+import itertools
+import json
+import math
+import os
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from pathlib import Path
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11, JSON specs only
+    tomllib = None
+
+MATRIX_KEYS = {"jobs", "cores", "gpus", "instances", "config", "repeats", "warmup"}
+REPEAT_SECONDS = 300.0  # guess for a repeat of a job never run on this host
+
+
+def load_spec(path):
+    path = Path(path)
+    if path.suffix == ".toml":
+        if tomllib is None:
+            raise Exception("TOML campaign specs need Python 3.11, use JSON")
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    return json.loads(path.read_text())
+
+
+def as_list(value):
+    if value is None:
+        return [None]
+    return value if isinstance(value, list) else [value]
+
+
+def expand(spec, engine):
+    """[unit] of every combination of every matrix in spec"""
+    defaults = spec.get("defaults", {})
+    units = []
+    for matrix in [defaults] + spec.get("matrix", []):
+        if unknown := set(matrix) - MATRIX_KEYS:
+            raise Exception(f"Unknown campaign spec keys {sorted(unknown)}")
+    for matrix in spec.get("matrix", []):
+        m = {**defaults, **matrix}
+        if m.get("gpus") is not None and not engine.uses_gpus:
+            raise Exception(f"{engine.name} does not use GPUs, remove gpus from spec")
+        for job, cores, gpus, instances, config in itertools.product(
+            as_list(m.get("jobs", engine.jobs)),
+            as_list(m.get("cores")),
+            as_list(m.get("gpus")),
+            as_list(m.get("instances")),
+            as_list(m.get("config")),
+        ):
+            if job not in engine.jobs:
+                raise Exception(f"Unknown benchmark {job} in campaign spec")
+            units.append(
+                {
+                    "job": job,
+                    "cores": cores,
+                    "gpus": None if gpus is None else str(gpus),
+                    "instances": instances,
+                    "config": config or None,
+                    "repeats": m.get("repeats", 3),
+                    "warmup": m.get("warmup", 0),
+                }
+            )
+    return units
+
+
+def coarse_to_fine(values):
+    """Largest, smallest, then bisecting: [1, 2, 4, 8, 16] -> [16, 1, 4, 2, 8]"""
+    values = sorted(set(values))
+    if len(values) < 2:
+        return values
+    order = [values[-1], values[0]]
+    intervals = [(0, len(values) - 1)]
+    while intervals:
+        halves = []
+        for low, high in intervals:
+            if high - low > 1:
+                mid = (low + high) // 2
+                order.append(values[mid])
+                halves += [(low, mid), (mid, high)]
+        intervals = halves
+    return order
+
+
+def unit_cores(unit):
+    return unit["cores"] or os.cpu_count()
+
+
+class Estimator:
+    """Seconds a unit will take, from earlier results of the same host
+
+    The nearest measured core count of the same job is scaled as if the job
+    scaled perfectly, and by the ratio of steps if both are known.
+    """
+
+    def __init__(self, records, engine):
+        self.engine = engine
+        self.history = defaultdict(list)  # job: [(cores, seconds, nsteps)]
+        for record in records:
+            result = record["result"]
+            if result.get("median_time") and result.get("num_processes"):
+                self.history[result["name"]].append(
+                    (
+                        result.get("cores_per_instance") or result["num_processes"],
+                        result["median_time"],
+                        result.get("nsteps"),
+                    )
+                )
+
+    def repeat_seconds(self, job, cores):
+        if not self.history[job]:
+            return REPEAT_SECONDS
+        measured, seconds, nsteps = min(
+            self.history[job], key=lambda h: abs(math.log(h[0] / cores))
+        )
+        seconds *= measured / cores
+        steps = self.engine.steps(job)
+        if steps and nsteps:
+            seconds *= steps / nsteps
+        return seconds
+
+    def unit_seconds(self, unit):
+        cores = unit_cores(unit)
+        if unit["instances"]:  # solo repeats, then every copy on its share
+            cores //= unit["instances"]
+            runs = 2 * unit["repeats"] + unit["warmup"]
+        else:
+            runs = unit["repeats"] + unit["warmup"]
+        return runs * self.repeat_seconds(unit["job"], max(1, cores))
+
+
+def schedule(units, estimator):
+    """Units in coarse to fine core count order, each with its "estimate" """
+    rank = {c: k for k, c in enumerate(coarse_to_fine(map(unit_cores, units)))}
+    ordered = sorted(units, key=lambda u: rank[unit_cores(u)])
+    for unit in ordered:
+        unit["estimate"] = round(estimator.unit_seconds(unit), 1)
+    return ordered
+
+
+def interleave(units, seed):
+    """[(block, unit index)] of every repeat, block by block, each shuffled"""
+    rng = random.Random(seed)
+    order = []
+    for block in range(max((u["repeats"] for u in units), default=0)):
+        slots = [k for k, u in enumerate(units) if u["repeats"] > block]
+        rng.shuffle(slots)
+        order += [(block, k) for k in slots]
+    return order
+
+
+def describe(unit):
+    text = f"{unit['job']} cores={unit['cores'] or 'all'}"
+    for key in ["gpus", "instances", "config"]:
+        if unit[key]:
+            text += f" {key}={unit[key]}"
+    return text
+
+
+def hms(seconds):
+    return str(timedelta(seconds=round(seconds)))
+
+
+class Progress:
+    """Live ETA of a campaign, the estimates of the steps (units or blocks)
+    still to run are scaled by how far off those of the finished ones were"""
+
+    def __init__(self, estimates):
+        self.estimates = estimates
+        self.started = time.monotonic()
+        self.estimated_done = 0.0
+        self.actual_done = 0.0
+
+    def start(self, k, what):
+        elapsed = time.monotonic() - self.started
+        correction = 1  # until a unit with a nonzero estimate has run
+        if self.estimated_done > 0:
+            correction = self.actual_done / self.estimated_done
+        remaining = correction * sum(self.estimates[k:])
+        finish = datetime.now() + timedelta(seconds=remaining)
+        print(
+            f"\nCampaign [{k + 1}/{len(self.estimates)}] {what}: "
+            f"elapsed {hms(elapsed)}, ETA {hms(remaining)} ({finish:%H:%M})"
+        )
+
+    def finish(self, k, seconds, ran=True):
+        if ran:  # steps taken from the journal say nothing about the estimates
+            self.estimated_done += self.estimates[k]
+            self.actual_done += seconds
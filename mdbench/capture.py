@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Streaming capture of benchmark engine output
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+CHUNK_SIZE = 64 * 1024  # bytes read from the engine pipe at a time
+TAIL_LINES = 40  # lines of output kept in memory for the console
+KILL_GRACE = 10.0  # seconds between SIGTERM and SIGKILL
+
+if os.name == "posix":
+    NEW_GROUP = {"start_new_session": True}
+else:
+    NEW_GROUP = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+
+RUNNING = {}  # engine process being captured: Event set once it is reaped
+
+
+class RunLog:
+    """Output of one engine run, on disk in full and in memory as a short tail"""
+
+    def __init__(self, path, tail_lines=TAIL_LINES):
+        self.path = Path(path)
+        self.tail = deque(maxlen=tail_lines)
+        self.num_bytes = 0
+        self.rusage = None
+        self.killed = None  # "timeout" or "stall" if the watchdog ended the run
+
+    def lines(self):
+        """Iterate over the lines of the log file without loading all of it"""
+        with open(self.path, "r", errors="replace") as f:
+            for line in f:
+                yield line.rstrip("\n")
+
+    def print_tail(self):
+        print(f".\n. Last {len(self.tail)} lines of {self.path}\n.")
+        for line in self.tail:
+            print(line.decode(errors="replace").rstrip())
+
+
+def signal_group(process, kill=False):
+    """SIGTERM (SIGKILL if kill) the process group of process, False if gone"""
+    try:
+        if os.name != "posix":
+            process.kill() if kill else process.terminate()
+        else:
+            os.killpg(process.pid, signal.SIGKILL if kill else signal.SIGTERM)
+    except (ProcessLookupError, PermissionError):
+        return False
+    return True
+
+
+def wait_exited(process, exited, timeout):
+    """Wait up to timeout seconds for process to exit, True if it did
+
+    exited is the Event of the thread that waits for the process, None if
+    no other thread does and it can be waited for here.
+    """
+    if exited is not None:
+        return exited.wait(timeout)
+    try:
+        process.wait(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return False
+    return True
+
+
+def terminate_group(process, grace=KILL_GRACE, exited=None):
+    """SIGTERM the process group of process, SIGKILL it if it is still there
+    after grace seconds (exited as for wait_exited)"""
+    terminate_groups([(process, exited)], grace)
+
+
+def terminate_groups(processes, grace=KILL_GRACE):
+    """terminate_group for several (process, exited) pairs, every group gets
+    SIGTERM at once and the grace period is shared"""
+    signalled = [(p, exited) for p, exited in processes if signal_group(p)]
+    deadline = time.monotonic() + grace
+    for process, exited in signalled:
+        if not wait_exited(process, exited, max(0.0, deadline - time.monotonic())):
+            signal_group(process, kill=True)
+            wait_exited(process, exited, grace)
+
+
+def terminate_running(grace=KILL_GRACE):
+    """Terminate every engine still being captured, e.g. on Ctrl-C"""
+    terminate_groups(list(RUNNING.items()), grace)
+
+
+class Watchdog:
+    """Terminate a run that takes longer than timeout seconds, or prints
+    nothing for stall_timeout seconds, along with its process group"""
+
+    def __init__(self, timeout=None, stall_timeout=None, grace=KILL_GRACE, poll=1.0):
+        self.timeout = timeout
+        self.stall_timeout = stall_timeout
+        self.grace = grace
+        self.poll = poll
+        self.reason = None
+        self.exited = threading.Event()
+        self.thread = None
+
+    def start(self, process):
+        self.started = self.last_output = time.monotonic()
+        self.thread = threading.Thread(target=self.watch, args=(process,), daemon=True)
+        self.thread.start()
+
+    def output(self):
+        self.last_output = time.monotonic()
+
+    def watch(self, process):
+        while not self.exited.wait(self.poll):
+            now = time.monotonic()
+            if self.timeout and now - self.started > self.timeout:
+                self.reason = "timeout"
+            elif self.stall_timeout and now - self.last_output > self.stall_timeout:
+                self.reason = "stall"
+            else:
+                continue
+            print(f"\nWatchdog: {self.reason}, terminating pid {process.pid}")
+            terminate_group(process, self.grace, self.exited)
+            return
+
+    def stop(self):
+        self.exited.set()
+        if self.thread is not None:
+            self.thread.join()
+
+
+def feed_parsers(parsers, lines):
+    if not parsers:
+        return
+    for raw in lines:
+        line = raw.decode(errors="replace").rstrip("\r")
+        for parser in parsers:
+            parser.feed(line)
+
+
+def wait_rusage(process):
+    """Wait for process, returning its return code and resource usage"""
+    if not hasattr(os, "wait4"):
+        return process.wait(), None
+    _, status, rusage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return process.returncode, rusage
+
+
+def run_cmd_rtn_out(
+    cmd,
+    log_path,
+    sys_env=None,
+    echo=True,
+    tail_lines=TAIL_LINES,
+    parsers=(),
+    monitors=(),
+    cwd=None,
+    timeout=None,
+    stall_timeout=None,
+    kill_grace=KILL_GRACE,
+):
+    """Run cmd streaming its output to log_path and return the run log and return code
+
+    Output is read in CHUNK_SIZE blocks and written to the log file and the
+    console a block at a time, only the last tail_lines lines are kept in memory.
+    Each complete line is passed to the feed() method of every parser as it
+    arrives so metrics are ready when the process exits. Monitors get
+    start(pid) once the process is running and stop(rusage) after it exits.
+
+    cmd runs in its own process group. With a timeout or stall_timeout (no
+    output for that many seconds) a Watchdog terminates the group, SIGTERM
+    then SIGKILL after kill_grace seconds, and run_log.killed says why.
+    """
+
+    log_path = Path(log_path)
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    run_log = RunLog(log_path, tail_lines)
+
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        env=sys_env,
+        cwd=cwd,
+        **NEW_GROUP,
+    )
+    RUNNING[process] = exited = threading.Event()
+    watchdog = None
+    if timeout or stall_timeout:
+        watchdog = Watchdog(timeout, stall_timeout, kill_grace)
+        watchdog.start(process)
+    for monitor in monitors:
+        monitor.start(process.pid)
+    fd = process.stdout.fileno()
+    partial = b""
+    try:
+        try:
+            with open(log_path, "wb") as log:
+                while chunk := os.read(fd, CHUNK_SIZE):
+                    if watchdog:
+                        watchdog.output()
+                    log.write(chunk)
+                    run_log.num_bytes += len(chunk)
+                    if echo:
+                        sys.stdout.buffer.write(chunk)
+                        sys.stdout.flush()
+                    lines = (partial + chunk).split(b"\n")
+                    partial = lines.pop()[-CHUNK_SIZE:]
+                    run_log.tail.extend(lines[-tail_lines:])
+                    feed_parsers(parsers, lines)
+        except BaseException:  # e.g. Ctrl-C, the engine is not in our process group
+            terminate_group(process, kill_grace)
+            raise
+        if partial:
+            run_log.tail.append(partial)
+            feed_parsers(parsers, [partial])
+        process.stdout.close()
+        rtn_code, run_log.rusage = wait_rusage(process)
+    finally:
+        exited.set()
+        RUNNING.pop(process, None)
+        if watchdog:
+            watchdog.stop()
+
+    if watchdog:
+        run_log.killed = watchdog.reason
+    for monitor in monitors:
+        monitor.stop(run_log.rusage)
+    if rtn_code != 0 and not echo:
+        run_log.print_tail()
+    return run_log, rtn_code
+
+
+def run_cmds_concurrently(
+    cmds, log_paths, parsers, sys_env=None, monitors=None, cwd=None, **watchdog
+):
+    """Start every cmd at the same time and wait for all of them
+
+    Each command is captured as by run_cmd_rtn_out without console echo, with
+    parsers[k], the optional monitors[k] and the watchdog keyword arguments
+    (timeout, stall_timeout, kill_grace). A list of (run log, return code)
+    in cmds order is returned.
+    """
+
+    outcomes = [None] * len(cmds)
+
+    def capture_one(k):
+        outcomes[k] = run_cmd_rtn_out(
+            cmds[k],
+            log_paths[k],
+            sys_env=sys_env,
+            echo=False,
+            parsers=[parsers[k]],
+            monitors=[monitors[k]] if monitors else (),
+            cwd=cwd,
+            **watchdog,
+        )
+
+    threads = [
+        threading.Thread(target=capture_one, args=(k,)) for k in range(len(cmds))
+    ]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except BaseException:  # only the main thread sees Ctrl-C
+        terminate_running(watchdog.get("kill_grace", KILL_GRACE))
+        raise
+    return outcomes
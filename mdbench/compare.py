@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Regression comparison of two benchmark result sets
+
+Results are matched by (name, num_processes, gpu_index_used, instances,
+launch_config) and the per repeat performance samples of each pair are
+tested for a difference. Each side is the latest campaign of its store
+unless another campaign id (or "all") is given, and results in different
+performance units are never pooled.
+
+    python -m mdbench.results_store compare baseline.jsonl candidate.jsonl
+
+exits with 1 if any matched configuration got significantly slower, or
+else with 3 if any had too few repeats for the test to reach alpha at all.
+The Mann-Whitney test needs at least 4 repeats on each side at the default
+alpha of 0.05 (3 against 3 can't get below p = 0.1, 3 against 5 can).
+"""
+
+import statistics as st
+from collections import defaultdict
+
+from .results_store import open_store, select_campaign
+from .stats import bootstrap_ratio_ci, mann_whitney_min_p, mann_whitney_u
+
+LOWER_IS_BETTER = {"days/ns"}
+INSUFFICIENT = "insufficient repeats"
+
+
+def config_key(config):
+    """Launch config as a hashable, order independent string (None if unset)"""
+    if not config:
+        return None
+    return " ".join(f"{k}={v}" for k, v in sorted(config.items()))
+
+
+def load_samples(path, campaign="latest"):
+    """{(name, num_processes, gpu_index_used, instances, launch_config):
+    (unit, [performance samples])} for one campaign, "latest" or "all" """
+    store = open_store(path)
+    grouped = defaultdict(lambda: [None, []])
+    for record in store.results(select_campaign(store, campaign)):
+        result = record["result"]
+        key = (
+            result.get("name"),
+            result.get("num_processes"),
+            (
+                None
+                if result.get("gpu_index_used") is None
+                else str(result.get("gpu_index_used"))
+            ),
+            result.get("instances"),
+            config_key(result.get("launch_config")),
+        )
+        unit = result.get("performance_unit")
+        if grouped[key][0] not in (None, unit):
+            raise ValueError(
+                f"{path}: {key} has results in both {grouped[key][0]} and {unit}"
+            )
+        grouped[key][0] = unit
+        grouped[key][1].extend(
+            result.get("performance_samples") or [result.get("performance")]
+        )
+    return {
+        k: (unit, [s for s in samples if s is not None])
+        for k, (unit, samples) in grouped.items()
+    }
+
+
+def compare_samples(base, new, unit, test="mannwhitney", alpha=0.05, threshold=0.0):
+    """Speedup of new over base (> 1 is faster) with its significance
+
+    The verdict is INSUFFICIENT, not "same", when there are too few samples
+    for the Mann-Whitney test to be significant whatever they are.
+    """
+    speedup = st.median(new) / st.median(base)
+    if unit in LOWER_IS_BETTER:
+        speedup = 1 / speedup
+
+    row = {"speedup": speedup, "p_value": None, "ci": None, "significant": None}
+    if len(base) >= 2 and len(new) >= 2:
+        if test == "bootstrap":
+            low, high = bootstrap_ratio_ci(base, new, level=1 - alpha)
+            if unit in LOWER_IS_BETTER:
+                low, high = 1 / high, 1 / low
+            row["ci"] = (low, high)
+            row["significant"] = low > 1 or high < 1
+        elif mann_whitney_min_p(len(base), len(new)) >= alpha:
+            row["verdict"] = INSUFFICIENT
+            return row
+        else:
+            row["p_value"] = mann_whitney_u(base, new)[1]
+            row["significant"] = row["p_value"] < alpha
+
+    if row["significant"] and abs(speedup - 1) >= threshold:
+        row["verdict"] = "faster" if speedup > 1 else "REGRESSION"
+    elif row["significant"] is None:
+        row["verdict"] = "n/a"
+    else:
+        row["verdict"] = "same"
+    return row
+
+
+def compare(
+    base_path,
+    new_path,
+    base_campaign="latest",
+    new_campaign="latest",
+    test="mannwhitney",
+    alpha=0.05,
+    threshold=0.0,
+):
+    """Print a comparison table, return the number of significant regressions
+    and of configurations with too few repeats to test"""
+
+    base = load_samples(base_path, base_campaign)
+    new = load_samples(new_path, new_campaign)
+    keys = sorted(base.keys() & new.keys(), key=str)
+    for key in keys:
+        if base[key][0] != new[key][0]:
+            raise ValueError(
+                f"{key} is in {base[key][0]} in the baseline, {new[key][0]} in new"
+            )
+
+    print(
+        f"{'job':10} {'cores':>5} {'gpus':>6} {'inst':>4} {'base':>11} {'new':>11} "
+        f"{'speedup':>8} {'p / CI':>16}  {'verdict':20} config"
+    )
+    regressions, insufficient = 0, 0
+    for key in keys:
+        (unit, base_samples), (_, new_samples) = base[key], new[key]
+        if not base_samples or not new_samples:
+            continue
+        row = compare_samples(base_samples, new_samples, unit, test, alpha, threshold)
+        if row["ci"]:
+            sig = f"[{row['ci'][0]:.3f}, {row['ci'][1]:.3f}]"
+        elif row["p_value"] is not None:
+            sig = f"p={row['p_value']:.4f}"
+        else:
+            sig = "-"
+        name, cores, gpus, instances, config = key
+        print(
+            f"{name:10} {cores!s:>5} {gpus!s:>6} {instances or '-'!s:>4} "
+            f"{st.median(base_samples):11.5f} {st.median(new_samples):11.5f} "
+            f"{row['speedup']:8.4f} {sig:>16}  {row['verdict']:20} {config or ''}"
+        )
+        regressions += row["verdict"] == "REGRESSION"
+        insufficient += row["verdict"] == INSUFFICIENT
+
+    for side, only in [
+        ("baseline", base.keys() - new.keys()),
+        ("new", new.keys() - base.keys()),
+    ]:
+        for key in sorted(only, key=str):
+            print(f"only in {side}: {key}")
+    if insufficient:
+        print(
+            f"\n{insufficient} configurations have too few repeats for p < {alpha}, "
+            "run at least 4 repeats on each side"
+        )
+    return regressions, insufficient
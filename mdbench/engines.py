@@ -0,0 +1,620 @@
+#!/usr/bin/env python3
+"""
+MD engines: how to launch, pin and read NAMD, GROMACS and LAMMPS
+
+An Engine builds the command line of a job, finds its inputs, sets up and
+cleans up around each run and turns the parsed output into performance
+samples. Everything else (repeats, pinning plans, monitors, statistics,
+results) is done the same way for every engine by runner.py.
+"""
+
+import itertools
+import json
+import os
+import re
+import shlex
+import shutil
+import statistics as st
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from .topology import format_cpulist, namd_pin_args
+from .metrics import (
+    BenchmarkSample,
+    GromacsParser,
+    LammpsParser,
+    LammpsPerformance,
+    Memory,
+    NamdParser,
+    Performance,
+    cycle_accounting,
+    engine_version,
+    save_timing_npz,
+    summarize_cycle_accounting,
+    summarize_timing,
+)
+
+VERSION_CACHE = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "md-bench"
+    / "engine_versions.json"
+)
+
+
+class Engine:
+    """What runner.py needs to know about an MD engine
+
+    Subclasses set the class attributes and implement job_path, commandline
+    and samples, the other methods are hooks with do-nothing defaults.
+    """
+
+    name = None
+    binary = None
+    jobs = []
+    unit = "ns/day"
+    parser = None
+    core_tag = "p"  # in log names, e.g. apoa1-p16-r0.log
+    uses_gpus = False
+    default_gpus = None
+    version_args = []
+    tune_fraction = 4  # the first tuning runs are this part of a full run
+    tune_steps = None  # or this many steps if steps() doesn't know a full run
+
+    def add_arguments(self, parser):
+        """Engine specific command line options"""
+
+    def configure(self, args):
+        """Take the engine specific options from the parsed command line"""
+
+    def job_path(self, job):
+        raise NotImplementedError
+
+    def commandline(
+        self, job, cores, gpus=None, cpus=None, topology=None, config=None, nsteps=None
+    ):
+        """Command line of job, pinned to cpus (in topology, if known) if given
+
+        config is a tuned configuration from tune_space(), nsteps shortens the
+        run for tuning.
+        """
+        raise NotImplementedError
+
+    def tune_space(self, cores, gpus):
+        """Candidate configurations for the tuner, nothing to tune by default"""
+        return [{}]
+
+    def offload_space(self, cores, gpus):
+        """Configurations offloading work to gpus for --offload-matrix, none by default"""
+        return []
+
+    def steps(self, job):
+        """MD steps one run of job takes, None if not known"""
+        return None
+
+    def cwd(self, job):
+        """Directory to run job in, None for the current one"""
+        return None
+
+    def env(self, gpus, cores):
+        """Environment to run with, None to inherit it"""
+        return None
+
+    def prepare(self, job, commandline):
+        """Command line for one run and the state finish() needs afterwards"""
+        return commandline, None
+
+    def finish(self, state, parser, log_path, elapsed):
+        """Clean up after one run, returns its engine specific details"""
+        return None
+
+    def summarize(self, details):
+        """Result fields from the finish() details of every repeat"""
+        return {}
+
+    def samples(self, parser):
+        """Performance samples, in performance_unit, printed by one run"""
+        raise NotImplementedError
+
+    def repeat_performance(self, samples):
+        """The value one run adds to the repeat statistics"""
+        return samples[-1] if samples else None
+
+    def rate(self, samples):
+        """Performance of one run in throughput_unit, higher is better"""
+        return self.repeat_performance(samples)
+
+    def performance_unit(self, job):
+        return self.unit
+
+    def throughput_unit(self, job):
+        return self.unit
+
+    def version(self):
+        """Version of the engine binary from its startup banner
+
+        The banner is only read once per binary, the version is cached in
+        VERSION_CACHE by binary path, mtime and arguments.
+        """
+        binary = shutil.which(str(self.binary))
+        if binary is None:
+            return None
+        binary = Path(binary).resolve()
+        key = f"{binary}|{binary.stat().st_mtime_ns}|{' '.join(self.version_args)}"
+        cached = load_version_cache()
+        if key in cached:
+            return cached[key]
+        try:
+            banner = subprocess.run(
+                [str(self.binary), *self.version_args],
+                capture_output=True,
+                text=True,
+                timeout=60,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        cached[key] = engine_version(banner.stdout + banner.stderr)
+        save_version_cache(cached)
+        return cached[key]
+
+
+def load_version_cache():
+    try:
+        return json.loads(VERSION_CACHE.read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_version_cache(cached):
+    try:
+        VERSION_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = VERSION_CACHE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(cached, indent=4))
+        tmp.replace(VERSION_CACHE)
+    except OSError as e:
+        print(f"Error: can't write engine version cache {VERSION_CACHE}: {e}")
+
+
+# ******************************************************************************
+# NAMD
+# ******************************************************************************
+class NamdEngine(Engine):
+    name = "NAMD"
+    jobs = ["f1atpase", "apoa1", "stmv"]
+    unit = "days/ns"
+    parser = NamdParser
+    version_args = ["+p1"]
+    tune_steps = 500
+    RESERVED = [0, 1, 2, 4]
+
+    def __init__(self, gpu=False):
+        build = "multicore-CUDA" if gpu else "multicore"
+        self.binary = Path(f"namd/NAMD_2.14_Linux-x86_64-{build}/namd2")
+        self.uses_gpus = gpu
+        self.default_gpus = 0 if gpu else None
+        self.settle_tolerance = 0.05
+        self.timing_npz = False
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--settle-tolerance",
+            type=float,
+            default=0.05,
+            help="Fraction of steady s/step within which TIMING: counts as settled",
+        )
+        parser.add_argument(
+            "--timing-npz",
+            action="store_true",
+            help="Save each run's TIMING: series next to its log (needs numpy)",
+        )
+
+    def configure(self, args):
+        self.settle_tolerance = args.settle_tolerance
+        self.timing_npz = args.timing_npz
+
+    def job_path(self, job):
+        job_path = Path(f"namd/{job}/{job}.namd")
+        if not job_path.exists():
+            raise Exception(f"Benchmark {job} path does not exist")
+        return job_path
+
+    def commandline(
+        self, job, cores, gpus=None, cpus=None, topology=None, config=None, nsteps=None
+    ):
+        """namd2 command line, pinned with +pemap if cpus are given
+
+        A config can leave reserve cores to the OS, give one core to a pinned
+        communication thread (+ppn/+commap) and reorder +devices. nsteps is
+        passed after the config file, where it overrides numsteps.
+        """
+        config = config or {}
+        available = list(cpus) if cpus is not None else list(range(cores))
+        workers = cores - config.get("reserve", 0) - (1 if config.get("commap") else 0)
+        commandline = f"{self.binary} +p{workers} +setcpuaffinity +idlepoll +isomalloc_sync".split()
+        if self.uses_gpus:
+            commandline += ["+devices", str(config.get("devices", gpus))]
+        comm_cpus = available[workers : workers + 1] if config.get("commap") else None
+        if comm_cpus:
+            commandline += ["+ppn", str(workers)]
+        if cpus is not None or comm_cpus:
+            commandline += namd_pin_args(available[:workers], comm_cpus)
+        commandline += [str(self.job_path(job))]
+        if nsteps:
+            commandline += ["--numsteps", str(nsteps)]
+        return commandline
+
+    def steps(self, job):
+        """numsteps of the job's config file"""
+        text = self.job_path(job).read_text(errors="replace")
+        found = re.findall(r"^\s*numsteps\s+(\d+)", text, re.IGNORECASE | re.MULTILINE)
+        return int(found[-1]) if found else None
+
+    def tune_space(self, cores, gpus):
+        """Reserved cores, a communication thread and every rotation of +devices"""
+        orders = [None]
+        if self.uses_gpus:
+            devices = str(gpus).split(",")
+            orders += [
+                ",".join(devices[k:] + devices[:k]) for k in range(1, len(devices))
+            ]
+        configs = []
+        for reserve in [r for r in self.RESERVED if r == 0 or 2 * r < cores]:
+            for commap in [False, True] if cores - reserve > 1 else [False]:
+                for devices in orders:
+                    config = {"reserve": reserve, "commap": commap, "devices": devices}
+                    configs.append({k: v for k, v in config.items() if v})
+        return configs
+
+    def finish(self, state, parser, log_path, elapsed):
+        if self.timing_npz:
+            save_timing_npz(Path(log_path).with_suffix(".timing.npz"), parser)
+        return {
+            "memory": [m.mb for m in parser.of_type(Memory)],
+            "timing": parser.summary(elapsed, self.settle_tolerance),
+        }
+
+    def summarize(self, details):
+        memory = [mb for d in details for mb in d["memory"]]
+        return {
+            "memory_usage": round(st.median(memory), 4) if memory else None,
+            **summarize_timing([d["timing"] for d in details]),
+        }
+
+    def samples(self, parser):
+        return [s.days_per_ns for s in parser.of_type(BenchmarkSample)]
+
+    def repeat_performance(self, samples):
+        return st.median(samples) if samples else None
+
+    def rate(self, samples):
+        return 1 / st.median(samples) if samples else None
+
+    def throughput_unit(self, job):
+        return "ns/day"
+
+
+# ******************************************************************************
+# GROMACS
+# ******************************************************************************
+def make_run_dir(job, scratch=None):
+    """Fresh directory for the output files of one mdrun, under scratch if given"""
+    if scratch is not None:
+        Path(scratch).mkdir(parents=True, exist_ok=True)
+    return Path(tempfile.mkdtemp(prefix=f"gmx-{job}-", dir=scratch))
+
+
+def remove_run_dir(run_dir, log_path, mdlog="keep"):
+    """Delete a run directory, first moving md.log next to log_path if kept"""
+    md_log = run_dir / "md.log"
+    if mdlog == "keep" and md_log.exists():
+        shutil.move(md_log, Path(log_path).with_suffix(".md.log"))
+    shutil.rmtree(run_dir, ignore_errors=True)
+
+
+class GromacsEngine(Engine):
+    """GROMACS on the CPU, or a GPU if gpus is given
+
+    Each run writes its output files (-deffnm) into its own directory under
+    scratch (e.g. /dev/shm), which is removed afterwards, md.log is moved to
+    the log directory unless mdlog is "discard". gmx is the command that
+    runs gmx, the NGC container launcher by default, else --gmx or GMX_PATH.
+    """
+
+    name = "GROMACS"
+    GMX = "gromacs/gromacs-ngc.run gmx"
+    jobs = ["MEM", "RIB", "PEP"]
+    parser = GromacsParser
+    core_tag = "ntomp"
+    uses_gpus = True
+    NSTEPS = {"MEM": "10000", "RIB": "1000", "PEP": "500"}
+    NSTLISTS = [None, 20, 40, 80]
+    CONFIG_FLAGS = ["npme", "nstlist", "nb", "pme", "bonded", "update", "gputasks"]
+
+    def __init__(self, scratch=None, mdlog="keep", gmx=None):
+        self.scratch = scratch
+        self.mdlog = mdlog
+        self.set_gmx(gmx)
+
+    def set_gmx(self, gmx=None):
+        self.gmx = shlex.split(gmx or os.environ.get("GMX_PATH") or self.GMX)
+        self.binary = Path(self.gmx[0])
+        self.version_args = self.gmx[1:] + ["--version"]
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scratch",
+            type=Path,
+            default=None,
+            help="Parent directory for per-run output files, e.g. /dev/shm",
+        )
+        parser.add_argument(
+            "--mdlog",
+            choices=["keep", "discard"],
+            default="keep",
+            help="Keep md.log of each run in the log directory or discard it",
+        )
+        parser.add_argument(
+            "--gmx",
+            default=None,
+            help=f"Command running gmx, default $GMX_PATH or {self.GMX}",
+        )
+
+    def configure(self, args):
+        self.scratch = args.scratch
+        self.mdlog = args.mdlog
+        self.set_gmx(args.gmx)
+
+    def job_path(self, job):
+        job_path = Path(f"gromacs/{job}/bench{job}.tpr")
+        if not job_path.exists():
+            raise Exception(f"Benchmark {job} path does not exist")
+        return job_path
+
+    def commandline(
+        self, job, cores, gpus=None, cpus=None, topology=None, config=None, nsteps=None
+    ):
+        """mdrun command line, pinned in mdrun's own order if the topology is known
+
+        A config splits cores into ntmpi thread-MPI ranks and may set npme,
+        nstlist, where -nb/-pme/-bonded/-update run and -gputasks. Shortened
+        tuning runs reset their counters half way so the reported ns/day
+        leaves out startup and load balancing.
+        """
+        if gpus is None:
+            dev_flag = "-nb cpu"
+        else:
+            dev_flag = f"-gpu_id {gpus}"
+
+        config = config or {}
+        if ntmpi := config.get("ntmpi"):
+            threads = f"-ntmpi {ntmpi} -ntomp {max(1, cores // ntmpi)}"
+        else:
+            threads = f"-ntomp {cores}"
+
+        commandline = [
+            *self.gmx,
+            "mdrun",
+            *dev_flag.split(),
+            *threads.split(),
+            "-s",
+            str(self.job_path(job)),
+            "-nsteps",
+            str(nsteps or self.NSTEPS[job]),
+        ]
+        for flag in self.CONFIG_FLAGS:
+            if config.get(flag) is not None:
+                commandline += [f"-{flag}", str(config[flag])]
+        if nsteps:
+            commandline += ["-resethway", "-noconfout"]
+        if cpus is None:
+            return commandline
+        if topology is not None:
+            prefix, pin_flags = topology.gromacs_pin(cpus)
+        else:
+            prefix, pin_flags = [], f"-pin on -pinoffset {cpus[0]} -pinstride 1".split()
+        return prefix + commandline + pin_flags
+
+    def steps(self, job):
+        return int(self.NSTEPS[job])
+
+    def tune_space(self, cores, gpus):
+        """Every ntmpi x ntomp split of cores with separate PME ranks and nstlist"""
+        configs = []
+        for ntmpi in [r for r in range(1, cores + 1) if cores % r == 0]:
+            npmes = [None] if ntmpi < 4 else [None, 0, ntmpi // 4, ntmpi // 2]
+            for npme in dict.fromkeys(npmes):
+                for nstlist in self.NSTLISTS:
+                    config = {"ntmpi": ntmpi, "npme": npme, "nstlist": nstlist}
+                    configs.append({k: v for k, v in config.items() if v is not None})
+        return configs
+
+    def offload_space(self, cores, gpus):
+        """-pme/-bonded/-update on gpu or cpu next to -nb gpu, 1 or 2 ranks per GPU
+
+        With several ranks each gets one GPU task in -gputasks, a GPU PME
+        task needs its own rank (-npme 1). Configurations with more ranks than
+        cores are left out, mdrun can't give a rank less than one thread.
+        """
+        ids = str(gpus).split(",")
+        sep = "" if all(len(i) == 1 for i in ids) else ","
+        configs = []
+        for pme, bonded, update in itertools.product(["gpu", "cpu"], repeat=3):
+            for per_gpu in [1, 2]:
+                ntmpi = per_gpu * len(ids)
+                if ntmpi > cores:
+                    continue
+                config = {"nb": "gpu", "pme": pme, "bonded": bonded, "update": update}
+                if ntmpi > 1:
+                    config["ntmpi"] = ntmpi
+                    config["gputasks"] = sep.join(
+                        i for i in ids for _ in range(per_gpu)
+                    )
+                    if pme == "gpu":
+                        config["npme"] = 1
+                configs.append(config)
+        return configs
+
+    def prepare(self, job, commandline):
+        run_dir = make_run_dir(job, self.scratch)
+        return commandline + ["-deffnm", str(run_dir / "md")], run_dir
+
+    def finish(self, run_dir, parser, log_path, elapsed):
+        cycles = cycle_accounting(run_dir / "md.log")
+        remove_run_dir(run_dir, log_path, self.mdlog)
+        return cycles
+
+    def summarize(self, details):
+        return {"cycle_accounting": summarize_cycle_accounting(details)}
+
+    def samples(self, parser):
+        return [p.ns_per_day for p in parser.of_type(Performance)]
+
+
+# ******************************************************************************
+# LAMMPS
+# ******************************************************************************
+class LammpsEngine(Engine):
+    """LAMMPS with the OPENMP package, or the GPU package if gpus is given
+
+    Runs in the job directory as the inputs read their data and potential
+    files relative to it. lj uses reduced units so its performance is tau/day.
+    """
+
+    name = "LAMMPS"
+    binary = Path("lammps/lmp")
+    jobs = ["lj", "rhodo", "eam"]
+    parser = LammpsParser
+    uses_gpus = True
+    version_args = ["-h"]
+    UNITS = {"lj": "tau/day"}
+
+    def job_path(self, job):
+        job_path = Path(f"lammps/{job}/in.{job}")
+        if not job_path.exists():
+            raise Exception(f"Benchmark {job} path does not exist")
+        return job_path
+
+    def steps(self, job):
+        """Total of the run commands of the job's input"""
+        text = self.job_path(job).read_text(errors="replace")
+        runs = re.findall(r"^\s*run\s+(\d+)", text, re.MULTILINE)
+        return sum(int(n) for n in runs) if runs else None
+
+    def cwd(self, job):
+        return self.job_path(job).parent
+
+    def env(self, gpus, cores):
+        env = dict(os.environ, OMP_NUM_THREADS=str(cores))
+        if gpus is not None:
+            env["CUDA_VISIBLE_DEVICES"] = str(gpus)
+        return env
+
+    def commandline(
+        self, job, cores, gpus=None, cpus=None, topology=None, config=None, nsteps=None
+    ):
+        """lmp command line, pinned with taskset if cpus are given"""
+        if gpus is None:
+            accel = f"-sf omp -pk omp {cores}"
+        else:
+            accel = f"-sf gpu -pk gpu {len(str(gpus).split(','))}"
+        commandline = [
+            str(self.binary.resolve()),
+            *accel.split(),
+            "-in",
+            self.job_path(job).name,
+            "-log",
+            "none",
+        ]
+        if cpus is not None:
+            commandline = ["taskset", "-c", format_cpulist(cpus)] + commandline
+        return commandline
+
+    def finish(self, state, parser, log_path, elapsed):
+        return [p.timesteps_per_s for p in parser.of_type(LammpsPerformance)]
+
+    def summarize(self, details):
+        steps = [s for d in details for s in d]
+        return {"timesteps_per_s": round(st.median(steps), 3) if steps else None}
+
+    def samples(self, parser):
+        return [p.per_day for p in parser.of_type(LammpsPerformance)]
+
+    def performance_unit(self, job):
+        return self.UNITS.get(job, "ns/day")
+
+    def throughput_unit(self, job):
+        return self.performance_unit(job)
+
+
+# ******************************************************************************
+# Replay
+# ******************************************************************************
+class ReplayEngine(Engine):
+    """replay.py standing in for a real engine, to benchmark the harness
+
+    Job "synthetic" generates lines of fmt output at line_rate lines a second,
+    any other job is the path of a captured fmt log to replay. Parsing and
+    samples are those of the real engine for fmt.
+    """
+
+    name = "Replay"
+    jobs = ["synthetic"]
+    binary = Path(__file__).with_name("replay.py")
+
+    def __init__(self, fmt="namd", lines=10000, line_rate=0, seed=None):
+        self.fmt = fmt
+        self.lines = lines
+        self.line_rate = line_rate
+        self.seed = seed
+        self.like = {"namd": NamdEngine, "gromacs": GromacsEngine}.get(
+            fmt, LammpsEngine
+        )()
+        self.parser = self.like.parser
+
+    def job_path(self, job):
+        if job == "synthetic":
+            return None
+        job_path = Path(job)
+        if not job_path.exists():
+            raise Exception(f"Benchmark {job} path does not exist")
+        return job_path
+
+    def commandline(
+        self, job, cores, gpus=None, cpus=None, topology=None, config=None, nsteps=None
+    ):
+        """replay.py command line, pinned with taskset if cpus are given"""
+        commandline = [
+            sys.executable,
+            str(self.binary),
+            self.fmt,
+            "--rate",
+            str(self.line_rate),
+        ]
+        if job_path := self.job_path(job):
+            commandline += ["--file", str(job_path)]
+        else:
+            commandline += ["--lines", str(nsteps or self.lines)]
+        if self.seed is not None:
+            commandline += ["--seed", str(self.seed)]
+        if cpus is not None:
+            commandline = ["taskset", "-c", format_cpulist(cpus)] + commandline
+        return commandline
+
+    def steps(self, job):
+        return self.lines if job == "synthetic" else None
+
+    def samples(self, parser):
+        return self.like.samples(parser)
+
+    def repeat_performance(self, samples):
+        return self.like.repeat_performance(samples)
+
+    def rate(self, samples):
+        return self.like.rate(samples)
+
+    def performance_unit(self, job):
+        return self.like.performance_unit(job)
+
+    def throughput_unit(self, job):
+        return self.like.throughput_unit(job)
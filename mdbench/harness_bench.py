@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks of the harness itself, no MD engine needed
+
+replay.py stands in for the engine, and each case is timed four ways:
+- raw: replay.py writing to /dev/null, the floor for everything else;
+- capture: run_cmd_rtn_out with no parsers (pipe, log file, tail);
+- parse: the engine's parser fed the captured lines in process, exactly
+  as run_cmd_rtn_out feeds them, so no process launch noise is in it;
+- run_single: the runner end to end, with monitors, then write_results.
+
+capture and run_single are compared with raw across separate launches, so
+each is reported with the noise of raw (its slowest minus fastest run),
+and an overhead that is lost in that noise is reported as 0, not as a
+negative number. Per line figures need enough lines to rise above it.
+The peak Python heap of a parsed capture (tracemalloc) and the peak RSS
+of this process are reported too:
+
+    python -m mdbench.harness_bench --formats namd gromacs --lines 100000 1000000
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from .capture import feed_parsers, run_cmd_rtn_out
+from .engines import ReplayEngine
+from meta_data import meta_data
+from .replay import FORMATS
+from .results_store import open_store
+from .runner import run_single, write_results
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def timed(fn, repeats):
+    """Fastest of repeats calls of fn in seconds, as timeit does, and the
+    spread of the calls (slowest minus fastest)"""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times), max(times) - min(times)
+
+
+def bench_case(fmt, lines, line_rate=0, repeats=5, work_dir="."):
+    """Harness overheads for one format and output length"""
+    engine = ReplayEngine(fmt, lines, line_rate, seed=0)
+    cmd = engine.commandline("synthetic", 1)
+    log_path = Path(work_dir) / f"{fmt}-{lines}.log"
+
+    def capture(parsers=()):
+        run_cmd_rtn_out(cmd, log_path, echo=False, parsers=parsers)
+
+    raw_s, noise_s = timed(
+        lambda: subprocess.run(cmd, stdout=subprocess.DEVNULL), repeats
+    )
+    capture_s, _ = timed(capture, repeats)
+
+    captured = log_path.read_bytes().splitlines()  # as capture feeds them
+    parse_s, _ = timed(lambda: feed_parsers([engine.parser()], captured), repeats)
+
+    tracemalloc.start()
+    capture([engine.parser()])
+    _, peak_heap = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    results = []
+    with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+        run_single_s, _ = timed(
+            lambda: results.append(
+                run_single(
+                    engine,
+                    "synthetic",
+                    repeats=1,
+                    cores=1,
+                    silent=True,
+                    log_dir=work_dir,
+                )
+            ),
+            repeats,
+        )
+    store = open_store(Path(work_dir) / f"{fmt}-{lines}.jsonl")
+    store.start_campaign(meta_data, {})
+    write_s, _ = timed(lambda: write_results(results[:1], store), repeats)
+
+    per_line = 1e6 / len(captured)
+    return {
+        "format": fmt,
+        "lines": len(captured),
+        "line_rate": line_rate,
+        "repeats": repeats,
+        "raw_s": round(raw_s, 4),
+        "noise_s": round(noise_s, 4),
+        "capture_us_per_line": round(max(0, capture_s - raw_s) * per_line, 3),
+        "noise_us_per_line": round(noise_s * per_line, 3),
+        "parse_us_per_line": round(parse_s * per_line, 3),
+        "run_single_overhead_s": round(max(0, run_single_s - raw_s), 4),
+        "write_results_ms": round(write_s * 1000, 3),
+        "peak_heap_kb": round(peak_heap / 1024, 1),
+        "performance": results[0]["performance"],
+    }
+
+
+def print_cases(cases):
+    print(
+        f"{'format':8} {'lines':>8} {'raw s':>8} {'noise s':>8} {'capture us/l':>13} "
+        f"{'noise us/l':>11} {'parse us/l':>11} {'run_single s':>13} "
+        f"{'write ms':>9} {'heap KB':>9}"
+    )
+    for c in cases:
+        print(
+            f"{c['format']:8} {c['lines']:>8} {c['raw_s']:>8} {c['noise_s']:>8} "
+            f"{c['capture_us_per_line']:>13} {c['noise_us_per_line']:>11} "
+            f"{c['parse_us_per_line']:>11} {c['run_single_overhead_s']:>13} "
+            f"{c['write_results_ms']:>9} {c['peak_heap_kb']:>9}"
+        )
+    if resource is not None:
+        maxrss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"peak RSS of the harness {maxrss_kb / 1024:.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the benchmark harness")
+    parser.add_argument("--formats", nargs="*", choices=FORMATS, default=FORMATS)
+    parser.add_argument("--lines", nargs="*", type=int, default=[100000, 1000000])
+    parser.add_argument(
+        "--rate", type=float, default=0, help="Engine lines per second, 0 unpaced"
+    )
+    parser.add_argument("-r", "--repeats", type=int, default=5)
+    parser.add_argument("-o", "--output", type=Path, default=None, help="JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="harness-bench-") as work_dir:
+        cases = [
+            bench_case(fmt, lines, args.rate, args.repeats, work_dir)
+            for fmt in args.formats
+            for lines in args.lines
+        ]
+    print_cases(cases)
+    if args.output:
+        args.output.write_text(json.dumps(cases, indent=4))
+
+
+if __name__ == "__main__":
+    main()
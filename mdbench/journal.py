@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Campaign journal, so an interrupted campaign can be resumed
+
+The journal sits next to the results store (results.jsonl.journal) as JSON
+Lines: the campaign and its planned units, then one line per finished
+unit, appended and fsynced as it finishes. A unit is one repeat of a job
+at a core count, gpus and instances, or the writing of that job's result.
+Finished repeats keep what the runner needs to rebuild the statistics, so
+--resume only runs what is left.
+"""
+
+import json
+import os
+from pathlib import Path
+
+from .results_store import now_iso
+
+
+def journal_path(store_path):
+    return Path(f"{store_path}.journal")
+
+
+def unit_key(job, cores, gpus, instances, unit, config=None):
+    if config:  # campaign units of the same job differing in launch config
+        return f"{job}|{cores}|{gpus}|{instances}|{json.dumps(config, sort_keys=True)}|{unit}"
+    return f"{job}|{cores}|{gpus}|{instances}|{unit}"
+
+
+class CampaignJournal:
+    """Planned and finished units of the latest campaign in path"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.campaign_id = None
+        self.planned = []
+        self.seed = None
+        self.finished = {}
+
+    def load(self):
+        """Read the journal, True if it holds a campaign to resume"""
+        if not self.path.exists():
+            return False
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line of an interrupted write
+                if record["type"] == "campaign":
+                    self.campaign_id = record["campaign_id"]
+                    self.planned = record["planned"]
+                    self.seed = record.get("seed")
+                    self.finished = {}
+                elif record["type"] == "unit":
+                    self.finished[record["key"]] = record["record"]
+        return self.campaign_id is not None
+
+    def _write(self, record, mode="a"):
+        with open(self.path, mode) as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def start(self, campaign_id, planned, seed=None):
+        """Start a new journal for campaign_id, replacing any old one
+
+        seed is that of an interleaved repeat order, kept to resume it.
+        """
+        self.campaign_id, self.planned, self.finished = campaign_id, planned, {}
+        self.seed = seed
+        self._write(
+            {
+                "type": "campaign",
+                "campaign_id": campaign_id,
+                "timestamp": now_iso(),
+                "planned": planned,
+                "seed": seed,
+            },
+            "w",
+        )
+
+    def get(self, key):
+        """The record of a finished unit, None if it is still to run"""
+        return self.finished.get(key)
+
+    def finish(self, key, record=None):
+        record = {} if record is None else record
+        self.finished[key] = record
+        self._write(
+            {"type": "unit", "key": key, "timestamp": now_iso(), "record": record}
+        )
+
+    def remaining(self):
+        return [key for key in self.planned if key not in self.finished]
+
+    def scope(self, job, cores, gpus, instances, config=None):
+        return JobJournal(self, job, cores, gpus, instances, config)
+
+
+class JobJournal:
+    """The units of one job of a campaign, named e.g. "r0" or "result" """
+
+    def __init__(self, journal, job, cores, gpus, instances, config=None):
+        self.journal = journal
+        self.parts = (job, cores, gpus, instances)
+        self.config = config
+
+    def get(self, unit):
+        return self.journal.get(unit_key(*self.parts, unit, self.config))
+
+    def finish(self, unit, record=None):
+        self.journal.finish(unit_key(*self.parts, unit, self.config), record)
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .topology import SYSFS, Topology
+
+specs = {}
+
+DMI = Path("/sys/devices/virtual/dmi/id")
+PCI = Path("/sys/bus/pci/devices")
+PCI_IDS = [
+    Path("/usr/share/misc/pci.ids"),
+    Path("/usr/share/hwdata/pci.ids"),
+    Path("/usr/share/pci.ids"),
+]
+BOOT_ID = Path("/proc/sys/kernel/random/boot_id")
+CACHE_VERSION = 2
+CACHE_FILE = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "md-bench"
+    / "linux_sysinfo.json"
+)
+
+
+def read(path, default="N/A"):
+    try:
+        return Path(path).read_text().strip()
+    except OSError:
+        return default
+
+
+def key_values(path, sep=":"):
+    """'key<sep>value' lines of a file as a dict, first occurrence wins"""
+    values = {}
+    for line in read(path, "").splitlines():
+        key, found, value = line.partition(sep)
+        if found:
+            values.setdefault(key.strip(), value.strip().strip('"'))
+    return values
+
+
+def get_lin_os():
+    return key_values("/etc/os-release", "=").get("PRETTY_NAME", "N/A")
+
+
+def get_lin_cpu():
+    return key_values("/proc/cpuinfo").get("model name", "N/A")
+
+
+def pci_name(vendor, device):
+    """Vendor and device names from pci.ids, the hex ids if it isn't installed"""
+    for ids in PCI_IDS:
+        if not ids.exists():
+            continue
+        vendor_name = device_name = None
+        with open(ids, errors="replace") as f:
+            for line in f:
+                if vendor_name is None:
+                    if line.startswith(vendor):
+                        vendor_name = line[len(vendor) :].strip()
+                elif line.startswith(f"\t{device}"):
+                    device_name = line[len(device) + 1 :].strip()
+                    break
+                elif not line.startswith(("\t", "#")):
+                    break  # next vendor
+        if vendor_name:
+            return f"{vendor_name} {device_name or device}"
+    return f"{vendor}:{device}"
+
+
+def get_lin_gpu():
+    for dev in sorted(PCI.glob("*")):
+        if read(dev / "class").startswith("0x0300"):  # VGA compatible controller
+            vendor = read(dev / "vendor")[2:]
+            device = read(dev / "device")[2:]
+            revision = read(dev / "revision")[2:]
+            return f"{pci_name(vendor, device)} (rev {revision})"
+    return "N/A"
+
+
+def get_lin_mb():
+    mb_vendor = read(DMI / "board_vendor")
+    mb_name = read(DMI / "board_name")
+    mb_version = read(DMI / "board_version")
+    return f"{mb_vendor} {mb_name} ({mb_version})"
+
+
+def get_lin_system():
+    mb_vendor = read(DMI / "board_vendor")
+    mb_version = read(DMI / "board_version")
+    return f"{mb_vendor} {mb_version}"
+
+
+def get_lin_ram():
+    mem_nonreserved = key_values("/proc/meminfo").get("MemTotal")
+    if mem_nonreserved is None:
+        return "N/A"
+    return f"{int(mem_nonreserved.split()[0])//(1024**2)} GB (Non-Reserved)"
+
+
+def get_lin_kernel():
+    return os.uname().release
+
+
+def get_lin_cpu_topology():
+    topology = Topology.from_sysfs()
+    summary = topology.summary()
+    smt = read(SYSFS / "cpu/smt/active", None)
+    summary["smt"] = smt == "1" if smt is not None else None
+    return summary
+
+
+def get_lin_numa():
+    nodes = []
+    for node_dir in sorted(
+        SYSFS.glob("node/node[0-9]*"), key=lambda d: int(d.name[4:])
+    ):
+        mem_kb = key_values(node_dir / "meminfo").get(
+            f"Node {node_dir.name[4:]} MemTotal"
+        )
+        nodes.append(
+            {
+                "node": int(node_dir.name[4:]),
+                "cpus": read(node_dir / "cpulist"),
+                "memory_mb": int(mem_kb.split()[0]) // 1024 if mem_kb else None,
+            }
+        )
+    return nodes
+
+
+def get_lin_cache():
+    """Size of each cache level and how many separate instances there are"""
+    caches = {}
+    for index in sorted(SYSFS.glob("cpu/cpu[0-9]*/cache/index[0-9]*")):
+        kind = {"Data": "d", "Instruction": "i"}.get(read(index / "type"), "")
+        name = f"l{read(index / 'level')}{kind}"
+        size = read(index / "size", "0K")
+        size_kb = int(size.rstrip("KM") or 0) * (1024 if size.endswith("M") else 1)
+        cache = caches.setdefault(name, {"size_kb": size_kb, "shared": set()})
+        cache["shared"].add(read(index / "shared_cpu_list"))
+    return {
+        name: {"size_kb": c["size_kb"], "instances": len(c["shared"])}
+        for name, c in sorted(caches.items())
+    }
+
+
+def get_lin_cpufreq():
+    """Frequency policy, not cached as it can change without a reboot"""
+    policies = sorted(SYSFS.glob("cpu/cpufreq/policy[0-9]*"))
+    if not policies:
+        return None
+    governors = sorted({read(p / "scaling_governor") for p in policies})
+    boost = read(SYSFS / "cpu/cpufreq/boost", None)
+    no_turbo = read(SYSFS / "cpu/intel_pstate/no_turbo", None)
+    if boost is not None:
+        boost = boost == "1"
+    elif no_turbo is not None:
+        boost = no_turbo == "0"
+    first = policies[0]
+    return {
+        "driver": read(first / "scaling_driver"),
+        "governor": governors[0] if len(governors) == 1 else governors,
+        "min_mhz": int(read(first / "cpuinfo_min_freq", "0")) // 1000,
+        "max_mhz": int(read(first / "cpuinfo_max_freq", "0")) // 1000,
+        "scaling_min_mhz": int(read(first / "scaling_min_freq", "0")) // 1000,
+        "scaling_max_mhz": int(read(first / "scaling_max_freq", "0")) // 1000,
+        "boost": boost,
+    }
+
+
+PROBES = {
+    "os": get_lin_os,
+    "cpu": get_lin_cpu,
+    "mb": get_lin_mb,
+    "ram": get_lin_ram,
+    "gpu": get_lin_gpu,
+    "system": get_lin_system,
+    "kernel": get_lin_kernel,
+    "cpu_topology": get_lin_cpu_topology,
+    "numa": get_lin_numa,
+    "cache": get_lin_cache,
+}
+
+
+def probe_specs(probes=PROBES):
+    """Run the independent probes in parallel, a failing probe gives N/A"""
+
+    def safe(probe):
+        try:
+            return probe()
+        except Exception as e:
+            print(f"Error: {probe.__name__}: {e}")
+            return "N/A"
+
+    with ThreadPoolExecutor(max_workers=len(probes)) as pool:
+        futures = {k: pool.submit(safe, probe) for k, probe in probes.items()}
+        return {k: f.result() for k, f in futures.items()}
+
+
+def load_cache(boot_id):
+    try:
+        cached = json.loads(CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        return None
+    if cached.get("boot_id") == boot_id and cached.get("version") == CACHE_VERSION:
+        return cached["specs"]
+    return None
+
+
+def save_cache(boot_id, probed):
+    try:
+        CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = CACHE_FILE.with_suffix(".tmp")
+        tmp.write_text(
+            json.dumps({"boot_id": boot_id, "version": CACHE_VERSION, "specs": probed})
+        )
+        tmp.replace(CACHE_FILE)
+    except OSError as e:
+        print(f"Error: can't write sysinfo cache {CACHE_FILE}: {e}")
+
+
+def specs_dict(use_cache=True):
+    """System specs, cached until the next reboot (boot_id changes)"""
+    boot_id = read(BOOT_ID, None)
+    probed = load_cache(boot_id) if use_cache and boot_id else None
+    if probed is None:
+        probed = probe_specs()
+        if boot_id:
+            save_cache(boot_id, probed)
+    specs.update(probed)
+    specs["cpufreq"] = get_lin_cpufreq()
+    specs["engine"] = "N/A"  # set by the benchmark from the engine banner
+    return specs
+
+
+def print_specs(specs):
+    print(f'{"*"*60}')
+    print(f"{'**** System Specs ****':^60s}")
+    print(f'{"*"*60}')
+    for k, v in specs.items():
+        print(f"{k:8} : {v}")
+    print(f'{"*"*60}')
+
+
+if __name__ == "__main__":
+    spec_info = specs_dict(use_cache=False)
+    print_specs(spec_info)
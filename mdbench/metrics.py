@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Incremental metric parsing of NAMD and GROMACS output
+"""
+
+import re
+import statistics as st
+import sys
+from array import array
+from collections import namedtuple
+
+from .stats import stability
+
+# ******************************************************************************
+# Metric events
+# ******************************************************************************
+BenchmarkSample = namedtuple("BenchmarkSample", "cpus s_per_step days_per_ns")
+Memory = namedtuple("Memory", "mb")
+WallClock = namedtuple("WallClock", "wall_s cpu_s")
+Performance = namedtuple("Performance", "ns_per_day hours_per_ns")
+StartupPhase = namedtuple("StartupPhase", "phase seconds")
+Startup = namedtuple("Startup", "seconds")
+Timing = namedtuple("Timing", "step cpu_s cpu_s_per_step wall_s wall_s_per_step")
+LammpsPerformance = namedtuple("LammpsPerformance", "per_day timesteps_per_s")
+
+NUM = r"[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?"
+
+
+class LineParser:
+    """Turn engine output lines into metric events as they arrive
+
+    Subclasses set RULES to (line prefix, regex, event type) tuples, the
+    named groups of the regex are the fields of the event.
+    """
+
+    RULES = ()
+
+    def __init__(self, on_event=None):
+        self.events = []
+        self.on_event = on_event
+
+    def feed(self, line):
+        found = []
+        stripped = line.lstrip()
+        for prefix, regex, event_type in self.RULES:
+            if stripped.startswith(prefix) and (m := regex.search(stripped)):
+                fields = m.groupdict()
+                event = event_type(
+                    **{
+                        k: int(v) if v.isdigit() else float(v)
+                        for k, v in fields.items()
+                    }
+                )
+                found.append(event)
+        for event in found:
+            self.events.append(event)
+            if self.on_event:
+                self.on_event(event)
+        return found
+
+    def of_type(self, event_type):
+        return [e for e in self.events if isinstance(e, event_type)]
+
+
+class NamdParser(LineParser):
+    RULES = (
+        (
+            "Info: Startup phase",
+            re.compile(rf"phase (?P<phase>\d+) took (?P<seconds>{NUM}) s"),
+            StartupPhase,
+        ),
+        (
+            "Info: Finished startup",
+            re.compile(rf"at (?P<seconds>{NUM}) s"),
+            Startup,
+        ),
+        (
+            "TIMING:",
+            re.compile(
+                rf"TIMING: (?P<step>\d+)\s+CPU: (?P<cpu_s>{NUM}), "
+                rf"(?P<cpu_s_per_step>{NUM})/step\s+Wall: (?P<wall_s>{NUM}), "
+                rf"(?P<wall_s_per_step>{NUM})/step"
+            ),
+            Timing,
+        ),
+        (
+            "Info: Benchmark time:",
+            re.compile(
+                rf"(?P<cpus>\d+) CPUs (?P<s_per_step>{NUM}) s/step "
+                rf"(?P<days_per_ns>{NUM}) days/ns"
+            ),
+            BenchmarkSample,
+        ),
+        (
+            "Info: Benchmark time:",
+            re.compile(rf"(?P<mb>{NUM}) MB memory"),
+            Memory,
+        ),
+        (
+            "WallClock:",
+            re.compile(rf"WallClock: (?P<wall_s>{NUM})\s+CPUTime: (?P<cpu_s>{NUM})"),
+            WallClock,
+        ),
+    )
+
+    def timing_series(self):
+        """TIMING: lines as compact arrays, one entry per line"""
+        timings = self.of_type(Timing)
+        return {
+            "step": array("q", [t.step for t in timings]),
+            "wall_s_per_step": array("d", [t.wall_s_per_step for t in timings]),
+            "cpu_s_per_step": array("d", [t.cpu_s_per_step for t in timings]),
+        }
+
+    def summary(self, wall_s=None, tolerance=0.05):
+        """Startup, steady state s/step, stability and harness overhead of one run
+
+        wall_s is the harness measured time of the run, the overhead is what
+        it adds to the engine's own WallClock (process launch, teardown).
+        """
+        series = self.timing_series()
+        startup = self.of_type(Startup)
+        timings = series["wall_s_per_step"]
+        benchmarks = self.of_type(BenchmarkSample)
+        if len(timings) > 1:
+            timings = timings[1:]  # the first interval includes the warm up
+        if timings:
+            s_per_step = st.median(timings)
+        elif benchmarks:
+            s_per_step = st.median(b.s_per_step for b in benchmarks)
+        else:
+            s_per_step = None
+        wallclock = self.of_type(WallClock)
+        engine_wall = wallclock[-1].wall_s if wallclock else None
+        return {
+            "startup_time": (
+                startup[-1].seconds
+                if startup
+                else sum(p.seconds for p in self.of_type(StartupPhase)) or None
+            ),
+            "s_per_step": s_per_step,
+            "engine_wallclock": engine_wall,
+            "harness_overhead": (
+                round(wall_s - engine_wall, 4)
+                if wall_s is not None and engine_wall is not None
+                else None
+            ),
+            "benchmark_samples": [b._asdict() for b in benchmarks],
+            "stability": stability(
+                series["step"], series["wall_s_per_step"], tolerance
+            ),
+        }
+
+
+def save_timing_npz(path, parser):
+    """Write the TIMING: series of a NamdParser to a .npz, needs numpy"""
+    try:
+        import numpy as np
+    except ImportError:
+        print(f"Error: numpy is not installed, not writing {path}")
+        return
+    np.savez_compressed(
+        path,
+        **{
+            k: np.frombuffer(v, dtype=v.typecode)
+            for k, v in parser.timing_series().items()
+        },
+    )
+
+
+def summarize_timing(summaries):
+    """Combine per repeat NamdParser summaries into result fields"""
+    combined = {}
+    for key in ["startup_time", "s_per_step", "engine_wallclock", "harness_overhead"]:
+        values = [s[key] for s in summaries if s[key] is not None]
+        combined[key] = round(st.median(values), 6) if values else None
+    combined["benchmark_samples"] = [s["benchmark_samples"] for s in summaries]
+    stable = {"repeats": [s["stability"] for s in summaries]}
+    for key, combine in [
+        ("drift", st.median),
+        ("cv", st.median),
+        ("settling_step", st.median_low),  # a step that was actually printed
+    ]:
+        values = [s["stability"][key] for s in summaries]
+        values = [v for v in values if v is not None]
+        stable[key] = combine(values) if values else None
+    combined["stability"] = stable
+    return combined
+
+
+class GromacsParser(LineParser):
+    RULES = (
+        (
+            "Performance:",
+            re.compile(
+                rf"Performance:\s+(?P<ns_per_day>{NUM})\s+(?P<hours_per_ns>{NUM})"
+            ),
+            Performance,
+        ),
+        (
+            "Time:",
+            re.compile(rf"Time:\s+(?P<cpu_s>{NUM})\s+(?P<wall_s>{NUM})"),
+            WallClock,
+        ),
+    )
+
+
+class LammpsParser(LineParser):
+    RULES = (
+        (
+            "Performance:",
+            re.compile(
+                rf"Performance: (?P<per_day>{NUM}) (?:tau|ns)/day, "
+                rf".*?(?P<timesteps_per_s>{NUM}) timesteps/s"
+            ),
+            LammpsPerformance,
+        ),
+    )
+
+
+CYCLE_HEADER = "R E A L   C Y C L E   A N D   T I M E   A C C O U N T I N G"
+CYCLE_ROW = re.compile(
+    rf"^\s(?P<name>\S.*?)\s{{2,}}(?:\d+\s+\d+\s+\d+\s+)?"
+    rf"(?P<wall_s>{NUM})\s+(?P<gcycles>{NUM})\s+(?P<percent>{NUM})\s*$"
+)
+BALANCE = [
+    (
+        "load_imbalance_percent",
+        re.compile(rf"Average load imbalance: (?P<v>{NUM})\s*%"),
+    ),
+    (
+        "load_imbalance_wait_percent",
+        re.compile(rf"waiting due to load imbalance: (?P<v>{NUM})\s*%"),
+    ),
+    ("pme_mesh_force_load", re.compile(rf"Average PME mesh/force load: (?P<v>{NUM})")),
+    (
+        "pme_pp_wait_percent",
+        re.compile(rf"waiting due to PP/PME imbalance: (?P<v>{NUM})\s*%"),
+    ),
+]
+
+
+def parse_cycle_accounting(lines):
+    """Phase breakdown, load balance and performance notes from a GROMACS md.log
+
+    "phases" maps each activity of the cycle and time accounting table to
+    its wall time and percentage, sub-tables (e.g. the PME mesh breakdown)
+    go under "breakdowns". Notes and warnings after the load balancing
+    report, which is where GROMACS reports imbalance, are kept as text.
+    """
+    result = {"phases": {}, "breakdowns": {}, "total_wall_s": None, "notes": []}
+    table = None
+    in_report = False
+    note = None
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if CYCLE_HEADER in line:
+            table, in_report = result["phases"], True
+            continue
+        if "load balancing report" in line:
+            in_report = True
+        for key, regex in BALANCE:
+            if m := regex.search(line):
+                result[key] = float(m["v"])
+        if note is not None:
+            if line.strip():
+                note.append(line.strip())
+                continue
+            result["notes"].append(" ".join(note))
+            note = None
+        if in_report and line.startswith(("NOTE:", "WARNING:")):
+            note = [line.strip()]
+            continue
+        if table is None:
+            continue
+        if line.lstrip().startswith("Breakdown of"):
+            table = result["breakdowns"].setdefault(
+                line.strip()[len("Breakdown of ") :], {}
+            )
+        elif line.lstrip().startswith(("Time:", "Performance:")):
+            table = None
+        elif m := CYCLE_ROW.match(line):
+            if m["name"] == "Total":
+                result["total_wall_s"] = float(m["wall_s"])
+            else:
+                table[m["name"].rstrip(" *")] = {
+                    "wall_s": float(m["wall_s"]),
+                    "percent": float(m["percent"]),
+                }
+    if note is not None:
+        result["notes"].append(" ".join(note))
+    return result if result["phases"] else None
+
+
+def cycle_accounting(md_log):
+    """parse_cycle_accounting of an md.log file, None if there is none"""
+    try:
+        with open(md_log, errors="replace") as f:
+            return parse_cycle_accounting(f)
+    except OSError:
+        return None
+
+
+def summarize_cycle_accounting(accountings):
+    """Median phase percentages and balance figures over repeats"""
+    accountings = [a for a in accountings if a]
+    if not accountings:
+        return None
+    phases = {}
+    for a in accountings:
+        for name, phase in a["phases"].items():
+            phases.setdefault(name, []).append(phase["percent"])
+    combined = {
+        "repeats": len(accountings),
+        "phase_percent": {k: round(st.median(v), 2) for k, v in phases.items()},
+    }
+    for key, _ in BALANCE:
+        values = [a[key] for a in accountings if key in a]
+        combined[key] = round(st.median(values), 4) if values else None
+    combined["notes"] = list(dict.fromkeys(n for a in accountings for n in a["notes"]))
+    return combined
+
+
+PARSERS = {"namd": NamdParser, "gromacs": GromacsParser, "lammps": LammpsParser}
+
+ENGINE_BANNERS = [
+    ("NAMD", re.compile(r"Info: NAMD (?P<version>\S+) for (?P<build>\S+)")),
+    ("GROMACS", re.compile(r"GROMACS version:\s+(?P<version>\S+)")),
+    ("GROMACS", re.compile(r":-\) GROMACS - gmx \S+, (?P<version>\S+) \(-:")),
+    ("LAMMPS", re.compile(r"LAMMPS \((?P<version>[^)]+)\)")),
+    ("LAMMPS", re.compile(r"Massively Parallel Simulator - (?P<version>.+)")),
+]
+
+
+def engine_version(text):
+    """{"name", "version", "build"} from an engine banner, None if not found"""
+    for name, regex in ENGINE_BANNERS:
+        if m := regex.search(text):
+            return {"name": name, "build": None, **m.groupdict()}
+    return None
+
+
+def parse_lines(lines, parser):
+    """Feed already captured lines (e.g. RunLog.lines()) through parser"""
+    for line in lines:
+        parser.feed(line.rstrip("\r\n"))
+    return parser
+
+
+if __name__ == "__main__":
+    # parse a saved log: metrics.py namd|gromacs|lammps|mdlog <log file>
+    engine, log_file = sys.argv[1:3]
+    if engine == "mdlog":
+        print(cycle_accounting(log_file))
+        sys.exit()
+    with open(log_file, errors="replace") as f:
+        for event in parse_lines(f, PARSERS[engine]()).events:
+            print(event)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Pre-flight check that the machine is quiet enough to benchmark on
+"""
+
+import os
+import time
+from pathlib import Path
+
+from .sampler import CLK_TCK, PROC, read_stat
+
+CPUFREQ = Path("/sys/devices/system/cpu/cpufreq")
+PREFLIGHT_ACTIONS = ["off", "warn", "wait", "abort"]
+PREFLIGHT_INTERVAL = 0.2  # seconds the cpu use of other processes is measured over
+
+
+def process_ticks():
+    """{pid: (comm, utime + stime ticks)} of every process"""
+    ticks = {}
+    for proc in PROC.glob("[0-9]*"):
+        try:
+            text = (proc / "stat").read_text()
+            fields = read_stat(proc / "stat")
+            comm = text[text.index("(") + 1 : text.rindex(")")]
+            ticks[int(proc.name)] = (comm, int(fields[11]) + int(fields[12]))
+        except (OSError, ValueError, IndexError):
+            continue  # exited while reading
+    return ticks
+
+
+def top_consumers(interval=PREFLIGHT_INTERVAL, count=5):
+    """[(pid, comm, cpu_percent)] busiest other processes over interval seconds"""
+    if not PROC.exists():
+        return []
+    before = process_ticks()
+    time.sleep(interval)
+    after = process_ticks()
+    own = os.getpid()
+    busy = [
+        (pid, comm, round(100 * (t - before[pid][1]) / CLK_TCK / interval, 1))
+        for pid, (comm, t) in after.items()
+        if pid in before and pid != own
+    ]
+    busy.sort(key=lambda b: b[2], reverse=True)
+    return [b for b in busy[:count] if b[2] > 0]
+
+
+def governors():
+    """Distinct scaling governors of the cpufreq policies"""
+    found = set()
+    for policy in CPUFREQ.glob("policy[0-9]*"):
+        try:
+            found.add((policy / "scaling_governor").read_text().strip())
+        except OSError:
+            pass
+    return sorted(found)
+
+
+def check(
+    max_load=1.0, max_busy=20.0, governor="performance", interval=PREFLIGHT_INTERVAL
+):
+    """One look at the machine, problems found are listed in "issues" """
+    load = os.getloadavg()[0] if hasattr(os, "getloadavg") else None
+    consumers = top_consumers(interval)
+    found = governors()
+    issues = []
+    if load is not None and max_load is not None and load > max_load:
+        issues.append(f"load average {load:.2f} > {max_load}")
+    for pid, comm, percent in consumers:
+        if max_busy is not None and percent > max_busy:
+            issues.append(f"{comm} (pid {pid}) using {percent}% cpu")
+    busy = bool(issues)
+    if governor and found and found != [governor]:
+        issues.append(f"cpufreq governor {','.join(found)}, not {governor}")
+    return {
+        "load_average": round(load, 2) if load is not None else None,
+        "top_consumers": [
+            {"pid": pid, "comm": comm, "cpu_percent": percent}
+            for pid, comm, percent in consumers
+        ],
+        "governors": found,
+        "issues": issues,
+        "busy": busy,
+    }
+
+
+def preflight(
+    action="warn",
+    max_load=1.0,
+    max_busy=20.0,
+    governor="performance",
+    timeout=300,
+    poll=10,
+    interval=PREFLIGHT_INTERVAL,
+):
+    """Check the machine before benchmarking
+
+    "warn" reports the issues and carries on, "wait" polls until the load
+    and busy processes settle (a governor can't change by waiting) or timeout
+    seconds pass, "abort" gives up on any issue. Busy processes are found
+    by their cpu use over interval seconds. Returns the last report, with
+    "ok" False if the benchmark should not start.
+    """
+    if action == "off":
+        return None
+    start = time.monotonic()
+    report = check(max_load, max_busy, governor, interval)
+    while action == "wait" and report["busy"] and time.monotonic() - start < timeout:
+        print(f"Pre-flight: waiting, {'; '.join(report['issues'])}")
+        time.sleep(poll)
+        report = check(max_load, max_busy, governor, interval)
+
+    report["waited"] = round(time.monotonic() - start, 1)
+    report["ok"] = {
+        "warn": True,
+        "wait": not report["busy"],
+        "abort": not report["issues"],
+    }[action]
+    for issue in report["issues"]:
+        print(f"Pre-flight {'error' if not report['ok'] else 'warning'}: {issue}")
+    return report
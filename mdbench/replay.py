@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Stand-in engine executable for benchmarking the harness itself
+
+Prints a captured engine log, or synthetic NAMD, GROMACS or LAMMPS output
+with the lines the parsers look for, at a given line rate:
+
+    python mdbench/replay.py namd --lines 100000 --rate 20000
+    python mdbench/replay.py --file logs/apoa1-p16-r0.log
+
+A rate of 0 prints as fast as the pipe takes it.
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+FORMATS = ["namd", "gromacs", "lammps"]
+PROGRESS_EVERY = 100  # body lines per TIMING: / step progress line
+
+
+def namd_lines(lines, rng):
+    s_per_step = 0.007 * rng.uniform(0.95, 1.05)
+    yield "Info: NAMD 2.14 for Linux-x86_64-multicore"
+    for phase in range(3):
+        yield f"Info: Startup phase {phase} took {rng.uniform(0.001, 0.5):.5f} s, 120.5 MB of memory in use"
+    yield "Info: Finished startup at 1.84212 s, 210.3 MB of memory in use"
+    for _ in range(3):
+        sample = s_per_step * rng.uniform(0.98, 1.02)
+        yield (
+            f"Info: Benchmark time: 36 CPUs {sample:.5f} s/step "
+            f"{sample * 5.787:.4f} days/ns 1001.53 MB memory"
+        )
+    for k in range(1, max(1, lines - 8)):
+        step = 10 * k
+        if k % PROGRESS_EVERY == 0:
+            wall = step * s_per_step
+            yield (
+                f"TIMING: {step}  CPU: {wall * 0.99:.2f}, {s_per_step * 0.99:.5f}/step  "
+                f"Wall: {wall:.2f}, {s_per_step:.5f}/step, 0.01 hours remaining, "
+                "312.6 MB of memory in use."
+            )
+        else:
+            yield (
+                f"ENERGY:  {step:>7}   {rng.uniform(-5e5, -4e5):14.4f}   "
+                f"{rng.uniform(1e4, 2e4):14.4f}   {rng.uniform(1e3, 2e3):14.4f}   "
+                f"{rng.uniform(300, 310):14.4f}"
+            )
+    yield f"WallClock: {lines * 10 * s_per_step:.2f}  CPUTime: 12.1  Memory: 312 MB"
+
+
+def gromacs_lines(lines, rng):
+    ns_per_day = 40 * rng.uniform(0.95, 1.05)
+    yield ":-) GROMACS - gmx mdrun, 2023.2 (-:"
+    for k in range(1, max(1, lines - 5)):
+        step = 100 * k
+        if k % PROGRESS_EVERY == 0:
+            yield f"imb F  2% step {step}, remaining wall clock time:    30 s"
+        else:
+            yield (
+                f"   Step {step:>10}   Time {step * 0.002:10.3f}   "
+                f"Potential {rng.uniform(-5e5, -4e5):14.4f}"
+            )
+    wall = 86.4 * 100 * lines * 0.002 / ns_per_day / 1000
+    yield "               Core t (s)   Wall t (s)        (%)"
+    yield f"       Time:     {wall * 16:10.3f}   {wall:10.3f}     1600.0"
+    yield "                 (ns/day)    (hour/ns)"
+    yield f"Performance:   {ns_per_day:10.3f}   {24 / ns_per_day:10.3f}"
+
+
+def lammps_lines(lines, rng):
+    steps_per_s = 40 * rng.uniform(0.95, 1.05)
+    yield "LAMMPS (2 Aug 2023 - Update 1)"
+    yield "Step          Temp          E_pair         E_mol          TotEng         Press"
+    for k in range(max(1, lines - 4)):
+        yield (
+            f"{100 * k:>8}   {rng.uniform(1.4, 1.6):12.6f}   {rng.uniform(-7, -6):12.6f}   "
+            f"0   {rng.uniform(-5, -4):12.6f}   {rng.uniform(5, 6):12.6f}"
+        )
+    yield f"Loop time of {lines / steps_per_s:.3f} on 4 procs for {lines} steps with 32000 atoms"
+    yield (
+        f"Performance: {steps_per_s * 432:.3f} tau/day, {steps_per_s:.3f} timesteps/s, "
+        f"{steps_per_s * 0.032:.3f} Matom-step/s"
+    )
+
+
+GENERATORS = {"namd": namd_lines, "gromacs": gromacs_lines, "lammps": lammps_lines}
+
+
+def synthetic_lines(fmt, lines=10000, seed=None):
+    """About lines lines of fmt output with parseable results at the end"""
+    return GENERATORS[fmt](lines, random.Random(seed))
+
+
+def file_lines(path):
+    with open(path, errors="replace") as f:
+        for line in f:
+            yield line.rstrip("\n")
+
+
+def emit(lines, rate=0, out=None):
+    """Write lines to out at rate lines per second (0 for unpaced)"""
+    out = out or sys.stdout
+    batch = max(1, int(rate // 100))  # pace about 100 times a second
+    start = time.perf_counter()
+    count = 0
+    for count, line in enumerate(lines, 1):
+        out.write(line + "\n")
+        if rate and count % batch == 0:
+            out.flush()
+            ahead = count / rate - (time.perf_counter() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+    out.flush()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay or synthesize engine output")
+    parser.add_argument("format", nargs="?", choices=FORMATS, default="namd")
+    parser.add_argument(
+        "--file", type=Path, default=None, help="Captured log to replay instead"
+    )
+    parser.add_argument("--lines", type=int, default=10000, help="Synthetic lines")
+    parser.add_argument(
+        "--rate", type=float, default=0, help="Lines per second, 0 for unpaced"
+    )
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.file is not None:
+        lines = file_lines(args.file)
+    else:
+        lines = synthetic_lines(args.format, args.lines, args.seed)
+    emit(lines, args.rate)
+
+
+if __name__ == "__main__":
+    main()
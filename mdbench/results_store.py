@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+"""
+Append-only benchmark results store (JSON Lines or SQLite)
+
+Each invocation of a benchmark starts a campaign record holding meta and
+specs, every result is then appended as its own record. Nothing already
+written is rewritten, so a write costs the same however large the store is
+and a crash can at most lose the record being written.
+
+Query or export to the classic results.json layout with:
+
+    python -m mdbench.results_store list results.jsonl
+    python -m mdbench.results_store query results.jsonl --job apoa1 --cores 16
+    python -m mdbench.results_store export results.jsonl -o results.json
+    python -m mdbench.results_store compare baseline.jsonl candidate.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import sys
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def host_fingerprint(specs):
+    """Short stable id of the machine a result came from"""
+    keys = ["os", "cpu", "mb", "ram", "gpu", "system"]
+    text = socket.gethostname() + "|" + "|".join(str(specs.get(k)) for k in keys)
+    return hashlib.sha1(text.encode()).hexdigest()[:12]
+
+
+def index_fields(result):
+    return {
+        "job": result.get("name"),
+        "cores": result.get("num_processes"),
+        "gpus": (
+            None
+            if result.get("gpu_index_used") is None
+            else str(result.get("gpu_index_used"))
+        ),
+    }
+
+
+def matches(record, filters):
+    return all(v is None or str(record.get(k)) == str(v) for k, v in filters.items())
+
+
+class JsonLinesStore:
+    """One JSON record per line, type "campaign" or "result" """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.campaign = None
+
+    def _write(self, record):
+        with open(self.path, "ab") as f:
+            if f.tell() and not self._ends_with_newline():
+                f.write(b"\n")  # a torn last line from a crash stays on its own
+            f.write(json.dumps(record).encode() + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def records(self):
+        if not self.path.exists():
+            return
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+    def start_campaign(self, meta, specs):
+        self.campaign = {
+            "type": "campaign",
+            "campaign_id": uuid.uuid4().hex[:12],
+            "timestamp": now_iso(),
+            "host": host_fingerprint(specs),
+            "meta": meta,
+            "specs": specs,
+        }
+        self._write(self.campaign)
+        return self.campaign["campaign_id"]
+
+    def resume_campaign(self, campaign_id):
+        """Append to an earlier campaign instead of a new one, False if not found"""
+        for campaign in self.campaigns():
+            if campaign["campaign_id"] == campaign_id:
+                self.campaign = campaign
+                return True
+        return False
+
+    def append(self, results):
+        for result in results:
+            self._write(
+                {
+                    "type": "result",
+                    "campaign_id": self.campaign["campaign_id"],
+                    "timestamp": now_iso(),
+                    "host": self.campaign["host"],
+                    **index_fields(result),
+                    "result": result,
+                }
+            )
+
+    def campaigns(self):
+        return [r for r in self.records() if r.get("type") == "campaign"]
+
+    def results(self, campaign_id=None, **filters):
+        for r in self.records():
+            if r.get("type") != "result":
+                continue
+            if campaign_id and r["campaign_id"] != campaign_id:
+                continue
+            if matches(r, filters):
+                yield r
+
+
+class SqliteStore:
+    """campaigns and results tables, results indexed for querying"""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS campaigns (
+        campaign_id TEXT PRIMARY KEY, timestamp TEXT, host TEXT,
+        meta TEXT, specs TEXT);
+    CREATE TABLE IF NOT EXISTS results (
+        id INTEGER PRIMARY KEY, campaign_id TEXT, timestamp TEXT, host TEXT,
+        job TEXT, cores INTEGER, gpus TEXT, result TEXT);
+    CREATE INDEX IF NOT EXISTS results_job ON results (job);
+    CREATE INDEX IF NOT EXISTS results_cores ON results (cores);
+    CREATE INDEX IF NOT EXISTS results_gpus ON results (gpus);
+    CREATE INDEX IF NOT EXISTS results_host ON results (host);
+    CREATE INDEX IF NOT EXISTS results_timestamp ON results (timestamp);
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.campaign = None
+        self.db = sqlite3.connect(self.path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(self.SCHEMA)
+
+    def start_campaign(self, meta, specs):
+        self.campaign = {
+            "type": "campaign",
+            "campaign_id": uuid.uuid4().hex[:12],
+            "timestamp": now_iso(),
+            "host": host_fingerprint(specs),
+            "meta": meta,
+            "specs": specs,
+        }
+        c = self.campaign
+        with self.db:
+            self.db.execute(
+                "INSERT INTO campaigns VALUES (?, ?, ?, ?, ?)",
+                (
+                    c["campaign_id"],
+                    c["timestamp"],
+                    c["host"],
+                    json.dumps(meta),
+                    json.dumps(specs),
+                ),
+            )
+        return c["campaign_id"]
+
+    def resume_campaign(self, campaign_id):
+        """Append to an earlier campaign instead of a new one, False if not found"""
+        for campaign in self.campaigns():
+            if campaign["campaign_id"] == campaign_id:
+                self.campaign = campaign
+                return True
+        return False
+
+    def append(self, results):
+        c = self.campaign
+        with self.db:
+            for result in results:
+                fields = index_fields(result)
+                self.db.execute(
+                    "INSERT INTO results (campaign_id, timestamp, host, job, cores, gpus, result)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        c["campaign_id"],
+                        now_iso(),
+                        c["host"],
+                        fields["job"],
+                        fields["cores"],
+                        fields["gpus"],
+                        json.dumps(result),
+                    ),
+                )
+
+    def campaigns(self):
+        rows = self.db.execute(
+            "SELECT campaign_id, timestamp, host, meta, specs FROM campaigns ORDER BY rowid"
+        )
+        return [
+            {
+                "type": "campaign",
+                "campaign_id": cid,
+                "timestamp": ts,
+                "host": host,
+                "meta": json.loads(meta),
+                "specs": json.loads(specs),
+            }
+            for cid, ts, host, meta, specs in rows
+        ]
+
+    def results(self, campaign_id=None, **filters):
+        where, args = [], []
+        if campaign_id:
+            where.append("campaign_id = ?")
+            args.append(campaign_id)
+        for key, value in filters.items():
+            if value is not None:
+                where.append(f"{key} = ?")
+                args.append(value)
+        sql = (
+            "SELECT campaign_id, timestamp, host, job, cores, gpus, result FROM results"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        for cid, ts, host, job, cores, gpus, result in self.db.execute(
+            sql + " ORDER BY id", args
+        ):
+            yield {
+                "type": "result",
+                "campaign_id": cid,
+                "timestamp": ts,
+                "host": host,
+                "job": job,
+                "cores": cores,
+                "gpus": gpus,
+                "result": json.loads(result),
+            }
+
+
+class JsonFileStore:
+    """The original single results.json document, rewritten on every append"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def start_campaign(self, meta, specs):
+        with open(self.path, "w") as f:
+            json.dump({"meta": meta, "specs": specs, "results": []}, f, indent=4)
+        return "json"
+
+    def resume_campaign(self, campaign_id):
+        """Keep appending to the existing document"""
+        return campaign_id == "json" and self.path.exists()
+
+    def append(self, results):
+        with open(self.path, "r") as f:
+            jason_results = json.load(f)
+        jason_results["results"].extend(results)
+        with open(self.path, "w") as f:
+            json.dump(jason_results, f, indent=4)
+
+    def campaigns(self):
+        with open(self.path, "r") as f:
+            doc = json.load(f)
+        specs = doc.get("specs", {})
+        return [
+            {
+                "type": "campaign",
+                "campaign_id": "json",
+                "timestamp": None,
+                "host": host_fingerprint(specs),
+                "meta": doc.get("meta"),
+                "specs": specs,
+            }
+        ]
+
+    def results(self, campaign_id=None, **filters):
+        with open(self.path, "r") as f:
+            doc = json.load(f)
+        for result in doc.get("results", []):
+            record = {
+                "type": "result",
+                "campaign_id": "json",
+                "host": host_fingerprint(doc.get("specs", {})),
+                **index_fields(result),
+            }
+            if matches(record, filters):
+                yield {**record, "result": result}
+
+
+def open_store(path):
+    """Store for path by suffix: .db/.sqlite, .json (legacy) or JSON Lines"""
+    suffix = Path(path).suffix
+    if suffix in (".db", ".sqlite", ".sqlite3"):
+        return SqliteStore(path)
+    if suffix == ".json":
+        return JsonFileStore(path)
+    return JsonLinesStore(path)
+
+
+def select_campaign(store, campaign="latest"):
+    """Campaign id for "latest", "all" (None) or a campaign id in the store"""
+    if campaign == "all":
+        return None
+    ids = [c["campaign_id"] for c in store.campaigns()]
+    if campaign == "latest":
+        return ids[-1] if ids else None
+    if campaign not in ids:
+        raise ValueError(f"{store.path} has no campaign {campaign}")
+    return campaign
+
+
+def export_json(store, campaign="latest"):
+    """Classic {"meta", "specs", "results"} document for a campaign or "all" """
+    campaigns = store.campaigns()
+    if not campaigns:
+        return {"meta": None, "specs": None, "results": []}
+    if campaign == "latest":
+        chosen = campaigns[-1]
+    elif campaign == "all":
+        chosen = dict(campaigns[-1], campaign_id=None)
+    else:
+        chosen = next(c for c in campaigns if c["campaign_id"] == campaign)
+    results = [r["result"] for r in store.results(chosen["campaign_id"])]
+    return {"meta": chosen["meta"], "specs": chosen["specs"], "results": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query and export benchmark results")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_cmd = commands.add_parser("list", help="List the campaigns in a store")
+    list_cmd.add_argument("store", type=Path, help="Results store (.jsonl, .db, .json)")
+
+    query_cmd = commands.add_parser("query", help="Print matching results")
+    export_cmd = commands.add_parser("export", help="Write the results.json layout")
+    for cmd in (query_cmd, export_cmd):
+        cmd.add_argument("store", type=Path, help="Results store (.jsonl, .db, .json)")
+        cmd.add_argument("--campaign", default=None, help="Campaign id, latest or all")
+    query_cmd.add_argument("--job", default=None)
+    query_cmd.add_argument("--cores", type=int, default=None)
+    query_cmd.add_argument("--gpus", default=None)
+    query_cmd.add_argument("--host", default=None)
+    export_cmd.add_argument("-o", "--output", type=Path, default=None)
+
+    compare_cmd = commands.add_parser(
+        "compare", help="Test two result sets for speedups and regressions"
+    )
+    compare_cmd.add_argument("baseline", type=Path)
+    compare_cmd.add_argument("new", type=Path)
+    for side in ("baseline", "new"):
+        compare_cmd.add_argument(
+            f"--{side}-campaign",
+            default="latest",
+            help="Campaign id, latest (default) or all",
+        )
+    compare_cmd.add_argument(
+        "--test", choices=["mannwhitney", "bootstrap"], default="mannwhitney"
+    )
+    compare_cmd.add_argument("--alpha", type=float, default=0.05)
+    compare_cmd.add_argument(
+        "--threshold",
+        type=float,
+        default=0.0,
+        help="Ignore significant changes smaller than this fraction",
+    )
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        from .compare import compare
+
+        try:
+            regressions, insufficient = compare(
+                args.baseline,
+                args.new,
+                args.baseline_campaign,
+                args.new_campaign,
+                test=args.test,
+                alpha=args.alpha,
+                threshold=args.threshold,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        sys.exit(1 if regressions else 3 if insufficient else 0)
+
+    store = open_store(args.store)
+
+    if args.command == "list":
+        for c in store.campaigns():
+            count = sum(1 for _ in store.results(c["campaign_id"]))
+            print(
+                f"{c['campaign_id']}  {c['timestamp']}  host {c['host']}  "
+                f"{c['meta'].get('benchmark_name')}  {count} results"
+            )
+    elif args.command == "query":
+        campaign = None if args.campaign in (None, "all") else args.campaign
+        filters = {"job": args.job, "cores": args.cores, "gpus": args.gpus}
+        for r in store.results(campaign, host=args.host, **filters):
+            result = r["result"]
+            print(
+                f"{r['campaign_id']}  {r.get('timestamp')}  {r['job']:10} "
+                f"cores {r['cores']}  gpus {r['gpus']}  "
+                f"{result.get('performance')} {result.get('performance_unit')}"
+            )
+    else:
+        doc = export_json(store, args.campaign or "latest")
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(doc, f, indent=4)
+        else:
+            json.dump(doc, sys.stdout, indent=4)
+
+
+if __name__ == "__main__":
+    main()
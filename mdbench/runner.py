@@ -0,0 +1,1134 @@
+#!/usr/bin/env python3
+"""
+Benchmark runner shared by every engine
+
+Repeats, warm-up, pinning, monitors, statistics, the results store and the
+command line are the same for NAMD, GROMACS and LAMMPS, an engine script
+only picks its Engine (see engines.py) and calls main().
+"""
+
+import itertools
+import random
+import statistics as st
+import time
+import argparse
+from pathlib import Path
+import subprocess
+import os
+import platform
+from meta_data import meta_data
+from .capture import run_cmd_rtn_out, run_cmds_concurrently
+from .stats import RepeatController
+from .topology import LAYOUTS, plan_layout, split_cpus
+from .sampler import ResourceSampler, summarize_resources
+from .thermal import THROTTLE_ACTIONS, ThermalMonitor, ThrottleGuard
+from .preflight import PREFLIGHT_ACTIONS, PREFLIGHT_INTERVAL, preflight
+from .results_store import host_fingerprint, open_store
+from .journal import CampaignJournal, journal_path, unit_key
+from .campaign import (
+    Estimator,
+    Progress,
+    describe,
+    expand,
+    interleave,
+    load_spec,
+    schedule,
+)
+from .tuner import TUNED_FILE, TunedConfigs, autotune, config_str
+
+# import sysinfo for the OS in use
+OS_IN_USE = platform.system()
+
+if OS_IN_USE == "Linux":
+    from . import linux_sysinfo as sysinfo
+elif OS_IN_USE == "Windows":
+    from . import windows_sysinfo as sysinfo
+else:
+    print("Unsupported OS, no sysinfo file available, exiting ...")
+    exit()
+
+
+# ******************************************************************************
+# Utility Functions
+# ******************************************************************************
+def nv_gpuinfo():
+    """nvidia-smi names and indexes of the GPUs, None without nvidia-smi"""
+    try:
+        result = subprocess.run(
+            ["nvidia-smi", "--query-gpu=name,index", "--format=csv,noheader"],
+            capture_output=True,
+            text=True,
+        )
+    except OSError:
+        return None
+    return result.stdout.replace("\n", "").split(",")
+
+
+def gpu_fields(engine, gpus):
+    """GPU fields of a result, nvidia-smi is only asked if GPUs were used"""
+    if not engine.uses_gpus:
+        return {}
+    gpus_available = nv_gpuinfo() if gpus is not None else None
+    return {"nv_gpus_available": gpus_available, "gpu_index_used": gpus}
+
+
+def tuned_config(engine, tuned, job, cores, gpus):
+    """The autotuned configuration of job, None if untuned"""
+    entry = tuned.get(engine.name, job, cores, gpus) if tuned else None
+    return entry["config"] if entry else None
+
+
+def failure_record(engine, run_log, rtn_code, parser, detail, elapsed):
+    """What is kept of a run that failed or was killed, None if it did not"""
+    if rtn_code == 0 and run_log.killed is None:
+        return None
+    return {
+        "log": str(run_log.path),
+        "rtn_code": rtn_code,
+        "killed": run_log.killed,
+        "elapsed": round(elapsed, 4),
+        "partial_samples": engine.samples(parser),
+        "partial": detail,
+    }
+
+
+def time_fields(timings):
+    """Run time statistics of the repeats that succeeded"""
+    if not timings:
+        return dict.fromkeys(
+            ["min_time", "max_time", "median_time", "standard_deviation"]
+        )
+    return {
+        "min_time": round(min(timings), 4),
+        "max_time": round(max(timings), 4),
+        "median_time": round(st.median(timings), 4),
+        "standard_deviation": round(st.stdev(timings), 4) if len(timings) > 1 else 0,
+    }
+
+
+def print_result(result):
+    print(f".\n. Result Summary ({result['name']})\n.")
+    for k, v in result.items():
+        num_str = f"{v:.4f}" if isinstance(v, float) else f"{v}"
+        print(f"{k:18} = {num_str}")
+
+
+# ******************************************************************************
+# run_single
+# ******************************************************************************
+class SingleRun:
+    """One copy of a job set up to run, the warm-up and repeats of run_single
+
+    Repeats are recorded in journal (a JobJournal) and taken from it if they
+    already ran, so they can be run in any order, e.g. interleaved with those
+    of other jobs, and the statistics computed afterwards by run_single.
+    """
+
+    def __init__(
+        self,
+        engine,
+        job,
+        cores=None,
+        gpus=None,
+        log_dir="logs",
+        layout=None,
+        sample_interval=0.5,
+        thermal_interval=1.0,
+        tuned=None,
+        config=None,
+        watchdog=None,
+        journal=None,
+    ):
+        self.engine, self.job, self.journal = engine, job, journal
+        self.gpus = engine.default_gpus if gpus is None else gpus
+        self.log_dir, self.watchdog = log_dir, watchdog
+        self.sample_interval, self.thermal_interval = sample_interval, thermal_interval
+
+        self.topology, self.cpus, self.pin_layout = None, None, None
+        if layout:
+            self.topology, self.cpus = plan_layout(cores, layout)
+            cores = len(self.cpus)
+            self.pin_layout = self.topology.describe(self.cpus, layout)
+        elif cores is None:  # set to all threads
+            cores = os.cpu_count()
+        self.cores = cores
+
+        if config is None:
+            config = tuned_config(engine, tuned, job, cores, self.gpus)
+        self.config = config
+        self.commandline = engine.commandline(
+            job, cores, self.gpus, self.cpus, self.topology, config=config
+        )
+        self.cwd, self.env = engine.cwd(job), engine.env(self.gpus, cores)
+        self.stem = f"{job}-{engine.core_tag}{cores}"
+
+    def run_once(self, log_path, monitors=()):
+        engine = self.engine
+        parser = engine.parser()
+        run_cmd, state = engine.prepare(self.job, self.commandline)
+        start_time = time.perf_counter()
+        run_log, rtn_code = run_cmd_rtn_out(
+            run_cmd,
+            log_path,
+            sys_env=self.env,
+            parsers=[parser],
+            monitors=monitors,
+            cwd=self.cwd,
+            **(self.watchdog or {}),
+        )
+        elapsed = time.perf_counter() - start_time
+        detail = engine.finish(state, parser, log_path, elapsed)
+        failure = failure_record(engine, run_log, rtn_code, parser, detail, elapsed)
+        return parser, elapsed, detail, failure
+
+    def warmup(self, k):
+        """Warm-up run k, discarded, pays for cold caches and startup"""
+        self.run_once(Path(self.log_dir) / f"{self.stem}-w{k}.log")
+
+    def repeat(self, i, extra=None):
+        """Record of repeat i, from the journal if it already ran
+
+        extra is added to the record, e.g. where an interleaved repeat ran.
+        """
+        record = self.journal.get(f"r{i}") if self.journal else None
+        if record is not None:
+            return record
+        monitors = []
+        if self.sample_interval:
+            monitors.append(ResourceSampler(self.sample_interval, self.cores))
+        thermal = None
+        if self.thermal_interval:
+            thermal = ThermalMonitor(self.cpus, self.thermal_interval)
+        parser, elapsed, detail, failure = self.run_once(
+            Path(self.log_dir) / f"{self.stem}-r{i}.log",
+            monitors + [thermal] if thermal else monitors,
+        )
+        record = {
+            "elapsed": elapsed,
+            "samples": self.engine.samples(parser),
+            "detail": detail,
+            "resources": [m.summary() for m in monitors],
+            "thermal": thermal.summary() if thermal else None,
+            "failure": failure,
+            **(extra or {}),
+        }
+        if self.journal:
+            self.journal.finish(f"r{i}", record)
+        return record
+
+
+def run_single(
+    engine,
+    job,
+    repeats=3,
+    cores=None,
+    gpus=None,
+    silent=False,
+    log_dir="logs",
+    adaptive=None,
+    layout=None,
+    sample_interval=0.5,
+    thermal_interval=1.0,
+    throttle=None,
+    warmup=0,
+    tuned=None,
+    config=None,
+    watchdog=None,
+    max_failures=3,
+    journal=None,
+):
+    """Run one copy of a job repeatedly as a benchmark
+
+    config is passed to engine.commandline(), without one the autotuned
+    configuration in tuned is used if there is one. watchdog holds the
+    run_cmd_rtn_out timeout, stall_timeout and kill_grace. Repeats that fail
+    or are killed are recorded in failed_repeats and left out of the
+    statistics, after max_failures of them the job is given up. Each repeat
+    is recorded in journal (a JobJournal) and taken from it if it already ran.
+    """
+
+    single = SingleRun(
+        engine,
+        job,
+        cores,
+        gpus,
+        log_dir,
+        layout,
+        sample_interval,
+        thermal_interval,
+        tuned,
+        config,
+        watchdog,
+        journal,
+    )
+    if journal is None or journal.get(f"r{repeats - 1}") is None:
+        for k in range(warmup):
+            single.warmup(k)
+
+    timings = []
+    performance = []
+    details = []
+    failed = []
+    sequence, seed = [], None  # where interleaved repeats ran
+
+    resources = []
+    controller = RepeatController(repeats, **(adaptive or {}))
+    guard = ThrottleGuard(**(throttle or {}))
+    i = 0
+    while not controller.done() and len(failed) < max_failures:
+        record = single.repeat(i)
+        if "sequence" in record:
+            sequence.append(record["sequence"])
+            seed = record["seed"]
+        if record["failure"]:
+            failed.append({"repeat": i, **record["failure"]})
+            i += 1
+            continue
+        verdict = guard.check(record["thermal"]) if record["thermal"] else "keep"
+        if verdict == "rerun":
+            i += 1
+            continue
+        timings.append(record["elapsed"])
+        resources.extend(record["resources"])
+        details.append(record["detail"])
+        samples = record["samples"] if verdict != "exclude" else []
+        performance.extend(samples)
+        controller.add(engine.repeat_performance(samples), record["elapsed"])
+        i += 1
+    if controller.stop_reason is None:  # given up after max_failures
+        controller.stop("max_failures")
+
+    result = {
+        "name": job,
+        "num_processes": single.cores,
+        **gpu_fields(engine, single.gpus),
+        "commandline": " ".join(single.commandline),
+        "launch_config": single.config,
+        "pin_layout": single.pin_layout,
+        **time_fields(timings),
+        "performance": round(st.median(performance), 5) if performance else None,
+        "performance_unit": engine.performance_unit(job),
+        "nsteps": engine.steps(job),
+        **engine.summarize(details),
+        "resources": summarize_resources(resources) if resources else None,
+        "thermal": guard.summary() if thermal_interval else None,
+        "warmup_repeats": warmup,
+        "failed_repeats": failed,
+        "interleave": {"seed": seed, "sequence": sequence} if sequence else None,
+        **controller.summary(),
+    }
+    print_result(result) if not silent else None
+    return result
+
+
+# ******************************************************************************
+# run_throughput
+# ******************************************************************************
+def run_throughput(
+    engine,
+    job,
+    instances,
+    repeats=3,
+    cores=None,
+    gpus=None,
+    silent=False,
+    log_dir="logs",
+    adaptive=None,
+    layout=None,
+    sample_interval=0.5,
+    thermal_interval=1.0,
+    throttle=None,
+    warmup=0,
+    tuned=None,
+    config=None,
+    watchdog=None,
+    max_failures=3,
+    journal=None,
+):
+    """Run several pinned copies of a job at once and report aggregate performance
+
+    config, or else the tuned one, is used for every copy. A repeat in which
+    any copy fails or is killed is recorded in failed_repeats and left out,
+    and repeats are journaled, as in run_single.
+    """
+
+    gpus = engine.default_gpus if gpus is None else gpus
+
+    topology = None
+    if layout:
+        topology, cpus = plan_layout(cores, layout)
+        cores = len(cpus)
+    else:
+        if cores is None:  # set to all threads
+            cores = os.cpu_count()
+        cpus = list(range(cores))
+
+    cores_per_instance = cores // instances
+    if cores_per_instance < 1:
+        raise Exception(f"Can't run {instances} instances on {cores} cores")
+
+    blocks = split_cpus(cpus, instances)
+    pin_layout = [topology.describe(b, layout) for b in blocks] if layout else None
+
+    if config is None:
+        config = tuned_config(engine, tuned, job, cores_per_instance, gpus)
+    commandlines = [
+        engine.commandline(
+            job, cores_per_instance, gpus, block, topology, config=config
+        )
+        for block in blocks
+    ]
+    cwd, env = engine.cwd(job), engine.env(gpus, cores_per_instance)
+
+    def run_batch(cmds, tag, thermal=None):
+        parsers = [engine.parser() for _ in cmds]
+        monitors = [
+            ResourceSampler(sample_interval, cores_per_instance)
+            for _ in cmds
+            if sample_interval
+        ]
+        log_paths = [Path(log_dir) / f"{job}-{tag}-i{k}.log" for k in range(len(cmds))]
+        prepared = [engine.prepare(job, c) for c in cmds]
+        start_time = time.perf_counter()
+        if thermal:
+            thermal.start(None)
+        outcomes = run_cmds_concurrently(
+            [c for c, _ in prepared],
+            log_paths,
+            parsers,
+            sys_env=env,
+            monitors=monitors,
+            cwd=cwd,
+            **(watchdog or {}),
+        )
+        elapsed = time.perf_counter() - start_time
+        if thermal:
+            thermal.stop()
+        details = [
+            engine.finish(state, parser, log_path, elapsed)
+            for (_, state), parser, log_path in zip(prepared, parsers, log_paths)
+        ]
+        failures = [
+            failure_record(engine, run_log, rtn_code, parser, detail, elapsed)
+            for (run_log, rtn_code), parser, detail in zip(outcomes, parsers, details)
+        ]
+        rates = [
+            None if failure else engine.rate(engine.samples(parser))
+            for failure, parser in zip(failures, parsers)
+        ]
+        return {
+            "rates": rates,
+            "elapsed": elapsed,
+            "details": details,
+            "failures": [f for f in failures if f],
+            "resources": [m.summary() for m in monitors],
+            "thermal": thermal.summary() if thermal else None,
+        }
+
+    def batch(cmds, tag, thermal=None):
+        """run_batch, or its record from the journal if it already ran"""
+        record = journal.get(tag) if journal else None
+        if record is None:
+            record = run_batch(cmds, tag, thermal)
+            if journal:
+                journal.finish(tag, record)
+        resources.extend(record["resources"])
+        return record
+
+    tp_tag = f"tp{instances}x{cores_per_instance}"
+    if journal is None or journal.get(f"{tp_tag}-r{repeats - 1}") is None:
+        for k in range(warmup):  # discarded, pays for cold caches and startup
+            run_batch(commandlines, f"{tp_tag}-w{k}")
+    resources = []
+    solo = []
+    failed = []
+    for i in range(repeats):
+        record = batch(commandlines[:1], f"solo{cores_per_instance}-r{i}")
+        solo.extend(record["rates"])
+        failed.extend({"repeat": f"solo{i}", **f} for f in record["failures"])
+
+    timings = []
+    details = []
+    instance_perf = [[] for _ in range(instances)]
+    controller = RepeatController(repeats, **(adaptive or {}))
+    guard = ThrottleGuard(**(throttle or {}))
+    i = 0
+    failed_batches = 0
+    while not controller.done() and failed_batches < max_failures:
+        thermal = ThermalMonitor(cpus, thermal_interval) if thermal_interval else None
+        record = batch(commandlines, f"{tp_tag}-r{i}", thermal)
+        perf, elapsed = record["rates"], record["elapsed"]
+        if record["failures"]:
+            failed.extend({"repeat": i, **f} for f in record["failures"])
+            failed_batches += 1
+            i += 1
+            continue
+        verdict = guard.check(record["thermal"]) if record["thermal"] else "keep"
+        if verdict == "rerun":
+            i += 1
+            continue
+        if verdict == "exclude":
+            perf = [None] * len(perf)
+        timings.append(elapsed)
+        details.extend(record["details"])
+        for k, rate in enumerate(perf):
+            if rate is not None:
+                instance_perf[k].append(rate)
+        controller.add(sum(rate for rate in perf if rate is not None), elapsed)
+        i += 1
+    if controller.stop_reason is None:  # given up after max_failures
+        controller.stop("max_failures")
+
+    instance_median = [round(st.median(p), 5) if p else None for p in instance_perf]
+    aggregate = round(sum(p for p in instance_median if p is not None), 5)
+    solo = [p for p in solo if p is not None]
+    solo_median = round(st.median(solo), 5) if solo else None
+    instance_mean = aggregate / instances
+
+    result = {
+        "name": job,
+        "num_processes": cores,
+        "instances": instances,
+        "cores_per_instance": cores_per_instance,
+        **gpu_fields(engine, gpus),
+        "commandline": [" ".join(c) for c in commandlines],
+        "launch_config": config,
+        "pin_layout": pin_layout,
+        **time_fields(timings),
+        "instance_performance": instance_median,
+        "solo_performance": solo_median,
+        "slowdown_vs_solo": (
+            round(solo_median / instance_mean, 4)
+            if solo_median and instance_mean
+            else None
+        ),
+        "performance": aggregate,
+        "performance_unit": engine.throughput_unit(job),
+        "nsteps": engine.steps(job),
+        **engine.summarize(details),
+        "resources": summarize_resources(resources) if resources else None,
+        "thermal": guard.summary() if thermal_interval else None,
+        "warmup_repeats": warmup,
+        "failed_repeats": failed,
+        **controller.summary(),
+    }
+    print_result(result) if not silent else None
+    return result
+
+
+# ******************************************************************************
+# run_matrix
+# ******************************************************************************
+def run_matrix(engine, job, gpu_sets, cores=None, silent=False, **kwargs):
+    """Run job CPU only, then in every engine.offload_space() configuration
+    on each of gpu_sets, and add the speedup over CPU only to every result"""
+
+    baseline = run_single(engine, job, cores=cores, gpus=None, silent=True, **kwargs)
+    results = [baseline]
+    for gpus in gpu_sets:
+        cpu_cores = baseline["num_processes"]
+        configs = engine.offload_space(cpu_cores, gpus)
+        if not configs:
+            print(f"\nNo offload configuration fits {cpu_cores} cores on gpus {gpus}")
+        for config in configs:
+            results.append(
+                run_single(
+                    engine,
+                    job,
+                    cores=cores,
+                    gpus=gpus,
+                    config=config,
+                    silent=True,
+                    **kwargs,
+                )
+            )
+
+    cpu_only = baseline["performance"]
+    for result in results:
+        performance = result["performance"]
+        result["speedup_vs_cpu"] = (
+            round(performance / cpu_only, 4) if performance and cpu_only else None
+        )
+
+    if not silent:
+        print(f".\n. Offload Matrix ({job}, {engine.performance_unit(job)})\n.")
+        for result in results:
+            gpus = result.get("gpu_index_used")
+            print(
+                f"{'cpu' if gpus is None else gpus:10} "
+                f"{config_str(result['launch_config'] or {}):60} "
+                f"{result['performance']} x{result['speedup_vs_cpu']}"
+            )
+    return results
+
+
+def run_job(engine, job, instances=None, store=None, journal=None, **kwargs):
+    """Run one job and write its result to store as soon as it finishes
+
+    With a journal (a CampaignJournal) every repeat is journaled, and a job
+    whose result was already written is skipped (None is returned).
+    """
+    scope = None
+    if journal is not None:
+        scope = journal.scope(
+            job,
+            kwargs.get("cores"),
+            kwargs.get("gpus"),
+            instances,
+            kwargs.get("config"),
+        )
+        if scope.get("result") is not None:
+            print(f"\nSkipping {job}, its result is already in the campaign")
+            return None
+    if instances:
+        result = run_throughput(engine, job, instances, journal=scope, **kwargs)
+    else:
+        result = run_single(engine, job, journal=scope, **kwargs)
+    if store is not None:
+        if write_results([result], store) and scope is not None:
+            scope.finish("result")  # else --resume writes it from the journal
+    return result
+
+
+def run_jobs(engine, jobs, **kwargs):
+    """run_job for each job"""
+    results = []
+    for job in jobs:
+        if job not in engine.jobs:
+            print(f"\nError: Unknown benchmark {job}")
+            continue
+        result = run_job(engine, job, **kwargs)
+        if result is not None:
+            results.append(result)
+    return results
+
+
+def campaign_keys(engine, units, kwargs):
+    """Journal keys of every repeat and result of the campaign units, with
+    the gpus etc. run_job will journal them under"""
+    keys = []
+    for u in units:
+        settings = unit_kwargs(engine, u, kwargs)
+        gpus = settings.get("gpus")
+        parts = (u["job"], settings["cores"], gpus, settings["instances"])
+        repeats = [] if u["instances"] else [f"r{i}" for i in range(u["repeats"])]
+        keys += [unit_key(*parts, unit, u["config"]) for unit in repeats + ["result"]]
+    return keys
+
+
+def unit_kwargs(engine, unit, kwargs):
+    """kwargs overridden by the job settings of a campaign unit"""
+    keys = ["cores", "instances", "config", "repeats", "warmup"]
+    overrides = {key: unit[key] for key in keys}
+    if engine.uses_gpus:
+        overrides["gpus"] = unit["gpus"] or kwargs.get("gpus")
+    return {**kwargs, **overrides}
+
+
+SINGLE_RUN_ARGS = [
+    "cores",
+    "gpus",
+    "log_dir",
+    "layout",
+    "sample_interval",
+    "thermal_interval",
+    "tuned",
+    "config",
+    "watchdog",
+]
+
+
+def run_interleaved(engine, units, journal, seed, max_failures=3, **kwargs):
+    """Run the repeats of single copy units in the order interleave(units, seed)
+
+    Each repeat is journaled with the seed and its place in the order, a
+    unit's warm-up runs just before its first repeat, and a unit gets no
+    more repeats after max_failures failed. Nothing is summarized here,
+    run_job computes the statistics from the journal afterwards.
+    """
+    if journal is None:
+        raise Exception("Interleaved repeats need a campaign journal")
+    runs = []
+    for unit in units:
+        settings = unit_kwargs(engine, unit, kwargs)
+        scope = journal.scope(
+            unit["job"], settings["cores"], settings.get("gpus"), None, unit["config"]
+        )
+        single_args = {k: settings[k] for k in SINGLE_RUN_ARGS if k in settings}
+        runs.append(SingleRun(engine, unit["job"], journal=scope, **single_args))
+
+    order = interleave(units, seed)
+    blocks = order[-1][0] + 1 if order else 0
+    per_repeat = [u["estimate"] / max(1, u["repeats"] + u["warmup"]) for u in units]
+    estimates = [
+        sum(
+            per_repeat[k] * (1 + units[k]["warmup"] * (b == 0))
+            for b, k in order
+            if b == block
+        )
+        for block in range(blocks)
+    ]
+    print(
+        f"\nInterleaving {len(order)} repeats of {len(units)} configurations "
+        f"in {blocks} randomized blocks, seed {seed}"
+    )
+
+    progress = Progress(estimates)
+    failures = [0] * len(units)
+    warmed = set()
+    slots = itertools.groupby(enumerate(order), key=lambda slot: slot[1][0])
+    for block, group in slots:
+        group = list(group)
+        progress.start(block, f"interleaved block of {len(group)} repeats")
+        start_time, ran = time.perf_counter(), False
+        for sequence, (_, k) in group:
+            record = runs[k].journal.get(f"r{block}")
+            if record is None and failures[k] < max_failures:
+                if k not in warmed:
+                    for w in range(units[k]["warmup"]):
+                        runs[k].warmup(w)
+                    warmed.add(k)
+                record = runs[k].repeat(block, {"seed": seed, "sequence": sequence})
+                ran = True
+            if record is not None and record["failure"]:
+                failures[k] += 1
+        progress.finish(block, time.perf_counter() - start_time, ran)
+
+
+def run_campaign(engine, units, store=None, journal=None, seed=None, **kwargs):
+    """run_job for each scheduled unit of a campaign spec, with a live ETA
+
+    A unit's job, cores, gpus, instances, config, repeats and warmup
+    override kwargs. With a seed the repeats of all the single copy units
+    run interleaved first (see run_interleaved), so their results only
+    summarize the journal, throughput units run one after the other.
+    """
+    interleaved = []
+    if seed is not None:
+        interleaved = [u for u in units if not u["instances"]]
+        run_interleaved(engine, interleaved, journal, seed, **kwargs)
+    progress = Progress([0 if u in interleaved else u["estimate"] for u in units])
+    results = []
+    for k, unit in enumerate(units):
+        progress.start(k, describe(unit))
+        start_time = time.perf_counter()
+        result = run_job(
+            engine,
+            unit["job"],
+            store=store,
+            journal=journal,
+            **unit_kwargs(engine, unit, kwargs),
+        )
+        ran = result is not None and unit not in interleaved
+        progress.finish(k, time.perf_counter() - start_time, ran)
+        if result is not None:
+            results.append(result)
+    return results
+
+
+def init_output_dict(engine, output_file, preflight_report=None, resume=None):
+    """Open the results store and record meta and specs for this invocation
+
+    resume is the id of a campaign to carry on appending to instead, if the
+    store still has it. Returns the store and the campaign id.
+    """
+    store = open_store(output_file)
+    if resume is not None and store.resume_campaign(resume):
+        return store, resume
+    specs = sysinfo.specs_dict()
+    specs["preflight"] = preflight_report
+    if version := engine.version():
+        specs["engine"] = f"{version['name']} {version['version']}"
+        specs["engine_version"] = version
+    return store, store.start_campaign(meta_data, specs)
+
+
+def write_results(results, store):
+    """Append results to store, False (and the error printed) if that failed"""
+    try:
+        store.append(results)
+    except Exception as e:
+        print(f"\nError: {e} writing results to {store.path}")
+        return False
+    return True
+
+
+# ******************************************************************************
+# Main Command Line Interface
+# ******************************************************************************
+def get_args(engine):
+    parser = argparse.ArgumentParser(description=f"{engine.name} benchmark")
+    parser.add_argument("-r", "--repeats", type=int, default=3)
+    parser.add_argument("--silent", action="store_true", help="Don't print results")
+    parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        default="results.jsonl",
+        help="Results store: .jsonl (JSON Lines), .db (SQLite) or legacy .json",
+    )
+    parser.add_argument(
+        "-c", "--cores", type=int, default=None, help="Number of cores to use"
+    )
+    if engine.uses_gpus:
+        parser.add_argument(
+            "-g",
+            "--gpus",
+            default=engine.default_gpus,
+            help="List of NVIDIA GPU indexes example 0,1,2,3",
+        )
+        parser.add_argument(
+            "--offload-matrix",
+            action="store_true",
+            help="Run each job CPU only and in every GPU offload configuration",
+        )
+        parser.add_argument(
+            "--gpu-sets",
+            nargs="*",
+            default=None,
+            help="GPU index lists for --offload-matrix, e.g. 0 0,1 0,1,2,3",
+        )
+    parser.add_argument(
+        "jobs",
+        nargs="*",
+        default=engine.jobs,
+        help="Jobs to run --list for list of jobs",
+    )
+    parser.add_argument("-l", "--list", action="store_true", help="List available jobs")
+    parser.add_argument("--scaling", nargs="*", help="list of #cores to use")
+    parser.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        default=None,
+        help="Pin to a sysfs topology layout, cores default to physical cores",
+    )
+    parser.add_argument(
+        "--instances",
+        type=int,
+        default=None,
+        help="Throughput mode: run this many pinned copies of each job at once",
+    )
+    parser.add_argument(
+        "--ci-width",
+        type=float,
+        default=None,
+        help="Adaptive repeats target relative CI width, e.g. 0.02",
+    )
+    parser.add_argument(
+        "--min-repeats", type=int, default=3, help="Adaptive repeats minimum"
+    )
+    parser.add_argument(
+        "--max-repeats", type=int, default=10, help="Adaptive repeats maximum"
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        help="Seconds per job, no repeat is started that would exceed it",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=0.5,
+        help="Seconds between /proc resource samples of the engine, 0 to disable",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=0,
+        help="Repeats run and discarded per job before measuring",
+    )
+    parser.add_argument(
+        "--preflight",
+        choices=PREFLIGHT_ACTIONS,
+        default="warn",
+        help="Check load, busy processes and governor first: warn, wait or abort",
+    )
+    parser.add_argument(
+        "--max-load",
+        type=float,
+        default=1.0,
+        help="Pre-flight limit on the 1 minute load average",
+    )
+    parser.add_argument(
+        "--max-busy",
+        type=float,
+        default=20.0,
+        help="Pre-flight limit on the cpu %% of any other process",
+    )
+    parser.add_argument(
+        "--governor",
+        default="performance",
+        help="Expected cpufreq governor, empty to skip the check",
+    )
+    parser.add_argument(
+        "--preflight-timeout",
+        type=float,
+        default=300,
+        help="Seconds --preflight wait waits for the machine to settle",
+    )
+    parser.add_argument(
+        "--preflight-interval",
+        type=float,
+        default=PREFLIGHT_INTERVAL,
+        help="Seconds over which pre-flight measures the cpu use of other processes",
+    )
+    parser.add_argument(
+        "--thermal-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between cpu frequency and temperature samples, 0 to disable",
+    )
+    parser.add_argument(
+        "--throttle-fraction",
+        type=float,
+        default=0.95,
+        help="A repeat is throttled below this fraction of the first one's MHz",
+    )
+    parser.add_argument(
+        "--throttle-action",
+        choices=THROTTLE_ACTIONS,
+        default="flag",
+        help="Keep, exclude from the statistics or rerun throttled repeats",
+    )
+    parser.add_argument(
+        "--max-reruns",
+        type=int,
+        default=3,
+        help="Most throttled repeats rerun per job with --throttle-action rerun",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        help="Seconds a run may take before it is terminated as failed",
+    )
+    parser.add_argument(
+        "--stall-timeout",
+        type=float,
+        default=None,
+        help="Terminate a run as hung after this many seconds without output",
+    )
+    parser.add_argument(
+        "--kill-grace",
+        type=float,
+        default=10.0,
+        help="Seconds between SIGTERM and SIGKILL of a terminated run",
+    )
+    parser.add_argument(
+        "--max-failures",
+        type=int,
+        default=3,
+        help="Failed or terminated repeats after which a job is given up",
+    )
+    parser.add_argument(
+        "--autotune",
+        action="store_true",
+        help="Search launch parameters with short runs and save the best, no benchmark",
+    )
+    parser.add_argument(
+        "--tune-steps",
+        type=int,
+        default=None,
+        help="Steps of the first, shortest, tuning runs (default: a quarter of a "
+        "full run), later rounds double them up to a full run",
+    )
+    parser.add_argument(
+        "--tune-file",
+        type=Path,
+        default=TUNED_FILE,
+        help="Tuned configurations, used by later runs on the same host",
+    )
+    parser.add_argument(
+        "--untuned",
+        action="store_true",
+        help="Ignore --tune-file and run the engine's default command line",
+    )
+    parser.add_argument(
+        "--campaign",
+        type=Path,
+        default=None,
+        help="Run the matrix of a .toml or .json campaign spec instead of jobs",
+    )
+    parser.add_argument(
+        "--interleave",
+        action="store_true",
+        help="Run the repeats of all jobs and core counts in randomized blocks",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Seed of the --interleave order, random and recorded by default",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Carry on the interrupted campaign in --output, skipping finished repeats",
+    )
+    parser.add_argument(
+        "--logdir",
+        type=Path,
+        default="logs",
+        help="Directory for the engine output log of each run",
+    )
+    engine.add_arguments(parser)
+    return parser.parse_args()
+
+
+def main(engine):
+    args = get_args(engine)
+    engine.configure(args)
+
+    if args.list:
+        print(f"\nAvailable Jobs: {engine.jobs} Default is all of them")
+        return
+
+    kwargs = {
+        "repeats": args.repeats,
+        "silent": args.silent,
+        "log_dir": args.logdir,
+        "instances": args.instances,
+        "layout": args.layout,
+        "sample_interval": args.sample_interval,
+        "thermal_interval": args.thermal_interval,
+        "warmup": args.warmup,
+        "throttle": {
+            "fraction": args.throttle_fraction,
+            "action": args.throttle_action,
+            "max_reruns": args.max_reruns,
+        },
+        "watchdog": {
+            "timeout": args.timeout,
+            "stall_timeout": args.stall_timeout,
+            "kill_grace": args.kill_grace,
+        },
+        "max_failures": args.max_failures,
+        "adaptive": {
+            "ci_width": args.ci_width,
+            "min_repeats": args.min_repeats,
+            "max_repeats": args.max_repeats,
+            "time_budget": args.time_budget,
+        },
+    }
+    if engine.uses_gpus:
+        kwargs["gpus"] = args.gpus
+
+    report = preflight(
+        args.preflight,
+        max_load=args.max_load,
+        max_busy=args.max_busy,
+        governor=args.governor,
+        timeout=args.preflight_timeout,
+        interval=args.preflight_interval,
+    )
+    if report is not None and not report["ok"]:
+        print("\nError: pre-flight check failed, not benchmarking")
+        return
+
+    cores_list = [int(c) for c in args.scaling] if args.scaling else [args.cores]
+    host = host_fingerprint(sysinfo.specs_dict())
+    tuned = TunedConfigs(args.tune_file, host)
+    if args.autotune:
+        for c in cores_list:
+            for job in args.jobs:
+                autotune(
+                    engine,
+                    job,
+                    cores=c,
+                    gpus=kwargs.get("gpus"),
+                    layout=args.layout,
+                    log_dir=args.logdir,
+                    min_steps=args.tune_steps,
+                    tuned=tuned,
+                    silent=args.silent,
+                    watchdog=kwargs["watchdog"],
+                )
+        return
+    kwargs["tuned"] = None if args.untuned else tuned
+
+    units = None
+    if args.campaign:
+        try:
+            units = expand(load_spec(args.campaign), engine)
+        except Exception as e:
+            print(f"\nError: {e} reading campaign spec {args.campaign}")
+            return
+
+    matrix = engine.uses_gpus and args.offload_matrix and units is None
+    if args.interleave and units is None and not matrix:
+        jobs = [job for job in args.jobs if job in engine.jobs]
+        for job in set(args.jobs) - set(jobs):
+            print(f"\nError: Unknown benchmark {job}")
+        units = expand(
+            {
+                "matrix": [
+                    {
+                        "jobs": jobs,
+                        "cores": cores_list,
+                        "instances": args.instances,
+                        "repeats": args.repeats,
+                        "warmup": args.warmup,
+                    }
+                ]
+            },
+            engine,
+        )
+    if matrix:
+        gpu_sets = args.gpu_sets or ([args.gpus] if args.gpus is not None else [])
+        if not gpu_sets or not engine.offload_space(os.cpu_count(), gpu_sets[0]):
+            print("\nError: no GPU offload configurations to run, see -g/--gpu-sets")
+            return
+        del kwargs["instances"], kwargs["gpus"]
+
+    # Open the results store and start a new campaign in it, or resume one
+    journal = CampaignJournal(journal_path(args.output))
+    resume = None
+    if args.resume and not matrix:
+        if journal.load():
+            resume = journal.campaign_id
+        else:
+            print(f"\nNo campaign to resume in {journal.path}, starting a new one")
+    store, campaign_id = init_output_dict(engine, args.output, report, resume)
+    if campaign_id == resume:
+        print(
+            f"\nResuming campaign {resume}: {len(journal.remaining())} of "
+            f"{len(journal.planned)} planned units left"
+        )
+
+    if units is not None:
+        units = schedule(units, Estimator(store.results(host=host), engine))
+        total = sum(u["estimate"] for u in units)
+        print(f"\nCampaign of {len(units)} units, about {total:.0f} s")
+        planned = campaign_keys(engine, units, kwargs)
+    else:
+        repeats = [] if args.instances else [f"r{i}" for i in range(args.repeats)]
+        planned = [
+            unit_key(job, c, kwargs.get("gpus"), args.instances, unit)
+            for c in cores_list
+            for job in args.jobs
+            for unit in repeats + ["result"]
+        ]
+    seed = None
+    if args.interleave:
+        seed = journal.seed if campaign_id == resume else args.seed
+        if seed is None:
+            seed = random.randrange(2**32)
+    if campaign_id != resume and not matrix:
+        journal.start(campaign_id, planned, seed)
+
+    if units is not None:
+        run_campaign(engine, units, store=store, journal=journal, seed=seed, **kwargs)
+    elif matrix:
+        for c in cores_list:
+            for job in args.jobs:
+                if job not in engine.jobs:
+                    print(f"\nError: Unknown benchmark {job}")
+                    continue
+                results = run_matrix(engine, job, gpu_sets, cores=c, **kwargs)
+                write_results(results, store)
+    else:
+        if args.scaling:
+            print(f"\nRunning {args.jobs} with scaling {args.scaling} cores")
+        for c in cores_list:
+            run_jobs(engine, args.jobs, cores=c, store=store, journal=journal, **kwargs)
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Background /proc resource sampling of a benchmark process tree
+"""
+
+import os
+import statistics as st
+import threading
+import time
+from array import array
+from pathlib import Path
+
+PROC = Path("/proc")
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024 if hasattr(os, "sysconf") else 4
+
+
+def read_stat(path):
+    """Fields of a /proc stat file after the (comm) field, field 3 is index 0"""
+    text = Path(path).read_text()
+    return text[text.rindex(")") + 2 :].split()
+
+
+def child_pids(pid):
+    """Direct children of pid"""
+    children = []
+    try:
+        for task in (PROC / str(pid) / "task").iterdir():
+            children += [int(c) for c in (task / "children").read_text().split()]
+    except FileNotFoundError:
+        # kernel without CONFIG_PROC_CHILDREN, scan ppid of every process
+        for proc in PROC.glob("[0-9]*"):
+            try:
+                if int(read_stat(proc / "stat")[1]) == pid:
+                    children.append(int(proc.name))
+            except (OSError, ValueError, IndexError):
+                pass
+    except OSError:
+        pass
+    return children
+
+
+def tree_pids(pid):
+    pids, todo = [], [pid]
+    while todo:
+        p = todo.pop()
+        pids.append(p)
+        todo += child_pids(p)
+    return pids
+
+
+class ResourceSampler:
+    """Poll RSS, per thread CPU time, context switches and thread count
+
+    Samples are kept in compact arrays, one entry per poll:
+    times (s), rss_kb, cpu_percent (whole tree, 100 = one core), threads,
+    ctxt_switches (voluntary + involuntary, cumulative).
+    """
+
+    def __init__(self, interval=0.5, cores=None):
+        self.interval = interval
+        self.cores = cores
+        self.times = array("d")
+        self.rss_kb = array("q")
+        self.cpu_percent = array("d")
+        self.threads = array("l")
+        self.ctxt_switches = array("q")
+        # tid -> (first time, first ticks, last time, last ticks)
+        self.thread_ticks = {}
+        self.rusage = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._last = None
+
+    def start(self, pid):
+        self.pid = pid
+        self._t0 = time.perf_counter()
+        if not PROC.exists():  # no /proc (Windows), only rusage is reported
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, rusage=None):
+        self.rusage = rusage
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        now = time.perf_counter() - self._t0
+        rss = threads = ctxt = ticks_total = 0
+        for pid in tree_pids(self.pid):
+            proc = PROC / str(pid)
+            try:
+                fields = read_stat(proc / "stat")
+                threads += int(fields[17])
+                rss += int(fields[21]) * PAGE_KB
+                for line in (proc / "status").read_text().splitlines():
+                    if "ctxt_switches" in line:
+                        ctxt += int(line.split()[1])
+                for task in (proc / "task").iterdir():
+                    task_fields = read_stat(task / "stat")
+                    ticks = int(task_fields[11]) + int(task_fields[12])
+                    ticks_total += ticks
+                    first = self.thread_ticks.get(task.name, (now, ticks))[:2]
+                    self.thread_ticks[task.name] = (*first, now, ticks)
+            except (OSError, ValueError, IndexError):
+                continue  # process or thread exited while reading
+
+        if self._last is not None:
+            last_now, last_ticks = self._last
+            busy = max(ticks_total - last_ticks, 0) / CLK_TCK
+            self.times.append(now)
+            self.rss_kb.append(rss)
+            self.cpu_percent.append(100 * busy / (now - last_now))
+            self.threads.append(threads)
+            self.ctxt_switches.append(ctxt)
+        self._last = (now, ticks_total)
+
+    def per_thread_cpu_percent(self):
+        return array(
+            "d",
+            [
+                100 * (t1 - t0) / CLK_TCK / (n1 - n0)
+                for n0, t0, n1, t1 in self.thread_ticks.values()
+                if n1 > n0
+            ],
+        )
+
+    def summary(self):
+        result = {"samples": len(self.times)}
+        if self.times:
+            mean_cpu = st.mean(self.cpu_percent)
+            threads = self.per_thread_cpu_percent()
+            result.update(
+                {
+                    "peak_rss_mb": round(max(self.rss_kb) / 1024, 2),
+                    "mean_cpu_percent": round(mean_cpu, 2),
+                    "max_threads": max(self.threads),
+                    "ctxt_switches": self.ctxt_switches[-1],
+                    "busy_threads": sum(1 for t in threads if t > 50),
+                    "thread_cpu_percent_median": (
+                        round(st.median(threads), 2) if threads else None
+                    ),
+                }
+            )
+            if self.cores:
+                idle = 1 - mean_cpu / 100 / self.cores
+                result["idle_core_fraction"] = round(min(max(idle, 0), 1), 4)
+        if self.rusage is not None:
+            maxrss_mb = self.rusage.ru_maxrss / 1024  # KiB on Linux
+            result["peak_rss_mb"] = round(
+                max(maxrss_mb, result.get("peak_rss_mb", 0)), 2
+            )
+            result["user_time"] = round(self.rusage.ru_utime, 4)
+            result["system_time"] = round(self.rusage.ru_stime, 4)
+            result["voluntary_ctxt_switches"] = self.rusage.ru_nvcsw
+            result["involuntary_ctxt_switches"] = self.rusage.ru_nivcsw
+        return result
+
+
+def summarize_resources(summaries):
+    """Combine per repeat sampler summaries into one result entry"""
+    combined = {"repeats": summaries}
+    for key, combine in [
+        ("peak_rss_mb", max),
+        ("mean_cpu_percent", st.median),
+        ("idle_core_fraction", st.median),
+    ]:
+        values = [s[key] for s in summaries if s.get(key) is not None]
+        combined[key] = round(combine(values), 4) if values else None
+    return combined
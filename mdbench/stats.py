@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Repeat statistics and adaptive repeat control
+"""
+
+import math
+import random
+import statistics as st
+
+N_BOOTSTRAP = 2000
+
+
+def bootstrap_ci(samples, level=0.95, n_boot=N_BOOTSTRAP, seed=0):
+    """Percentile bootstrap confidence interval of the median of samples"""
+    rng = random.Random(seed)
+    n = len(samples)
+    medians = sorted(st.median(rng.choices(samples, k=n)) for _ in range(n_boot))
+    alpha = (1 - level) / 2
+    low = medians[int(alpha * (n_boot - 1))]
+    high = medians[int((1 - alpha) * (n_boot - 1))]
+    return low, high
+
+
+def bootstrap_ratio_ci(base, new, level=0.95, n_boot=N_BOOTSTRAP, seed=0):
+    """Percentile bootstrap confidence interval of median(new) / median(base)"""
+    rng = random.Random(seed)
+    ratios = sorted(
+        st.median(rng.choices(new, k=len(new)))
+        / st.median(rng.choices(base, k=len(base)))
+        for _ in range(n_boot)
+    )
+    alpha = (1 - level) / 2
+    return ratios[int(alpha * (n_boot - 1))], ratios[int((1 - alpha) * (n_boot - 1))]
+
+
+def mann_whitney_min_p(n1, n2):
+    """Smallest two sided exact Mann-Whitney p value of n1 and n2 samples
+
+    Reached when the samples do not overlap at all, 0.1 for 3 against 3,
+    so with fewer repeats than that allows no difference is significant.
+    """
+    return min(2 / math.comb(n1 + n2, n1), 1.0)
+
+
+def mann_whitney_u(a, b):
+    """Two sided Mann-Whitney U test, returns (U of a, p value)
+
+    The p value is exact when there are no ties and the samples are small,
+    as is usual for benchmark repeats, otherwise the tie corrected normal
+    approximation is used.
+    """
+
+    n1, n2 = len(a), len(b)
+    pooled = sorted((v, g) for g, sample in enumerate((a, b)) for v in sample)
+    ranks, ties = {}, []
+    i = 0
+    while i < len(pooled):
+        j = i
+        while j < len(pooled) and pooled[j][0] == pooled[i][0]:
+            j += 1
+        ranks[pooled[i][0]] = (i + j + 1) / 2
+        ties.append(j - i)
+        i = j
+    u1 = sum(ranks[v] for v in a) - n1 * (n1 + 1) / 2
+    u = min(u1, n1 * n2 - u1)
+
+    if max(ties) == 1 and n1 * n2 <= 400:
+        # counts[k] = orderings of n1 + n2 items with U = k, built up one item at a time
+        counts = [[[1] + [0] * (n1 * n2) for _ in range(n2 + 1)] for _ in range(n1 + 1)]
+        for i in range(n1 + 1):
+            for j in range(n2 + 1):
+                if i == 0 or j == 0:
+                    continue
+                counts[i][j] = [
+                    counts[i - 1][j][k] + (counts[i][j - 1][k - i] if k >= i else 0)
+                    for k in range(n1 * n2 + 1)
+                ]
+        total = math.comb(n1 + n2, n1)
+        p = 2 * sum(counts[n1][n2][: int(u) + 1]) / total
+        return u1, min(p, 1.0)
+
+    n = n1 + n2
+    tie_term = sum(t**3 - t for t in ties) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12 * ((n + 1) - tie_term))
+    if sigma == 0:
+        return u1, 1.0
+    z = (abs(u1 - n1 * n2 / 2) - 0.5) / sigma
+    return u1, min(math.erfc(max(z, 0) / math.sqrt(2)), 1.0)
+
+
+def stability(steps, values, tolerance=0.05):
+    """Drift, coefficient of variation and settling step of a per step series
+
+    drift is the least squares trend of values as a fraction of their mean
+    per 1000 steps, settling_step the first step from which every value
+    stays within tolerance of the median of the second half of the run.
+    """
+    if len(values) < 2:
+        return {"drift": None, "cv": None, "settling_step": None}
+    mean = st.mean(values)
+    mean_step = st.mean(steps)
+    sxx = sum((x - mean_step) ** 2 for x in steps)
+    slope = (
+        sum((x - mean_step) * (y - mean) for x, y in zip(steps, values)) / sxx
+        if sxx
+        else 0.0
+    )
+    steady = st.median(values[len(values) // 2 :])
+    settled = None
+    for k in range(len(values) - 1, -1, -1):
+        if abs(values[k] - steady) > tolerance * steady:
+            break
+        settled = k
+    return {
+        "drift": round(1000 * slope / mean, 6) if mean else None,
+        "cv": round(st.stdev(values) / mean, 6) if mean else None,
+        "settling_step": steps[settled] if settled is not None else None,
+    }
+
+
+class RepeatController:
+    """Decide when to stop repeating a job
+
+    With ci_width None this runs a fixed number of repeats. Otherwise it keeps
+    going until the bootstrap CI of the median performance is narrower than
+    ci_width relative to the median, stopping early at max_repeats or when
+    another repeat would not fit in time_budget seconds.
+    """
+
+    def __init__(
+        self, repeats=3, ci_width=None, min_repeats=3, max_repeats=10, time_budget=None
+    ):
+        self.repeats = repeats
+        self.ci_width = ci_width
+        self.min_repeats = min_repeats
+        self.max_repeats = max_repeats
+        self.time_budget = time_budget
+        self.performance = []
+        self.timings = []
+        self.stop_reason = None
+
+    def add(self, performance, seconds):
+        if performance is not None:
+            self.performance.append(performance)
+        self.timings.append(seconds)
+
+    def ci(self):
+        if len(self.performance) < 2:
+            return None, None, None
+        low, high = bootstrap_ci(self.performance)
+        median = st.median(self.performance)
+        return low, high, (high - low) / median if median else None
+
+    def done(self):
+        n = len(self.timings)
+        if self.ci_width is None:
+            if n >= self.repeats:
+                self.stop_reason = "fixed_repeats"
+        elif n >= self.max_repeats:
+            self.stop_reason = "max_repeats"
+        elif n >= self.min_repeats and (rel := self.ci()[2]) is not None:
+            if rel <= self.ci_width:
+                self.stop_reason = "ci_target_met"
+        if self.stop_reason is None and self.time_budget is not None and n:
+            if sum(self.timings) + st.mean(self.timings) > self.time_budget:
+                self.stop_reason = "time_budget"
+        return self.stop_reason is not None
+
+    def stop(self, reason):
+        """Stop for a reason of the caller's, e.g. "max_failures" """
+        self.stop_reason = reason
+
+    def summary(self):
+        low, high, rel = self.ci()
+        return {
+            "repeats_run": len(self.timings),
+            "stop_reason": self.stop_reason,
+            "performance_ci": (
+                [round(low, 5), round(high, 5)] if low is not None else None
+            ),
+            "performance_ci_rel_width": round(rel, 4) if rel is not None else None,
+            "performance_samples": [round(p, 5) for p in self.performance],
+        }
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+CPU frequency and temperature monitoring to catch throttled repeats
+"""
+
+import statistics as st
+import threading
+from array import array
+from pathlib import Path
+
+CPU = Path("/sys/devices/system/cpu")
+THERMAL = Path("/sys/class/thermal")
+THROTTLE_ACTIONS = ["flag", "exclude", "rerun"]
+
+
+def online_cpus():
+    from .topology import parse_cpulist
+
+    return parse_cpulist((CPU / "online").read_text())
+
+
+class ThermalMonitor:
+    """Sample scaling_cur_freq of the cpus in use and thermal zone temperatures
+
+    Used as a run_cmd_rtn_out monitor, mean frequency (MHz) and the hottest
+    zone (C) of each poll are kept in compact arrays.
+    """
+
+    def __init__(self, cpus=None, interval=1.0):
+        self.interval = interval
+        self.cpus = cpus
+        self.mhz = array("d")
+        self.temp_c = array("d")
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self, pid):
+        try:
+            cpus = self.cpus if self.cpus is not None else online_cpus()
+        except OSError:
+            return
+        self._freq_files = [CPU / f"cpu{c}/cpufreq/scaling_cur_freq" for c in cpus]
+        self._freq_files = [f for f in self._freq_files if f.exists()]
+        self._temp_files = sorted(THERMAL.glob("thermal_zone*/temp"))
+        if self._freq_files or self._temp_files:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self, rusage=None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        self.sample()
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    @staticmethod
+    def _read_ints(files):
+        values = []
+        for f in files:
+            try:
+                values.append(int(f.read_text()))
+            except (OSError, ValueError):
+                pass
+        return values
+
+    def sample(self):
+        if khz := self._read_ints(self._freq_files):
+            self.mhz.append(sum(khz) / len(khz) / 1000)
+        if milli_c := self._read_ints(self._temp_files):
+            self.temp_c.append(max(milli_c) / 1000)
+
+    def summary(self):
+        result = {"samples": max(len(self.mhz), len(self.temp_c))}
+        if self.mhz:
+            result["mean_mhz"] = round(st.mean(self.mhz), 1)
+            result["min_mhz"] = round(min(self.mhz), 1)
+        if self.temp_c:
+            result["mean_temp_c"] = round(st.mean(self.temp_c), 1)
+            result["max_temp_c"] = round(max(self.temp_c), 1)
+        return result
+
+
+def is_throttled(summary, reference, fraction=0.95):
+    """True if the mean frequency of a repeat fell below fraction of reference"""
+    if not reference or "mean_mhz" not in summary or "mean_mhz" not in reference:
+        return False
+    return summary["mean_mhz"] < fraction * reference["mean_mhz"]
+
+
+class ThrottleGuard:
+    """Judge each repeat against the first one and decide what to do with it
+
+    action "flag" keeps throttled repeats, "exclude" drops their performance
+    from the statistics and "rerun" discards them and runs the repeat again,
+    at most max_reruns times per job.
+    """
+
+    def __init__(self, fraction=0.95, action="flag", max_reruns=3):
+        self.fraction = fraction
+        self.action = action
+        self.max_reruns = max_reruns
+        self.reference = None
+        self.repeats = []
+        self.reruns = 0
+
+    def check(self, summary):
+        """ "keep", "exclude" or "rerun" for the repeat with this summary"""
+        throttled = is_throttled(summary, self.reference, self.fraction)
+        if self.reference is None and "mean_mhz" in summary:
+            self.reference = summary
+        verdict = "keep"
+        if throttled and self.action == "rerun" and self.reruns < self.max_reruns:
+            self.reruns += 1
+            verdict = "rerun"
+        elif throttled and self.action in ("exclude", "rerun"):
+            verdict = "exclude"
+        self.repeats.append({**summary, "throttled": throttled, "action": verdict})
+        return verdict
+
+    def summary(self):
+        return {
+            "repeats": self.repeats,
+            "throttled_repeats": [
+                i for i, r in enumerate(self.repeats) if r["throttled"]
+            ],
+            "reruns": self.reruns,
+            "reference_mhz": (self.reference or {}).get("mean_mhz"),
+        }
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+CPU topology from sysfs and pinning layouts for NAMD and GROMACS
+"""
+
+from collections import namedtuple
+from pathlib import Path
+
+SYSFS = Path("/sys/devices/system")
+LAYOUTS = ["compact", "scatter", "physical"]
+
+HwThread = namedtuple("HwThread", "cpu socket core node smt")
+
+
+def parse_cpulist(text):
+    """'0-3,8,10-11' -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = []
+    for part in text.strip().split(","):
+        if part:
+            first, _, last = part.partition("-")
+            cpus.extend(range(int(first), int(last or first) + 1))
+    return cpus
+
+
+def format_cpulist(cpus):
+    """[0, 1, 2, 3, 8, 10, 11] -> '0-3,8,10-11'"""
+    ranges = []
+    for cpu in cpus:
+        if ranges and cpu == ranges[-1][1] + 1:
+            ranges[-1][1] = cpu
+        else:
+            ranges.append([cpu, cpu])
+    return ",".join(f"{a}-{b}" if a != b else f"{a}" for a, b in ranges)
+
+
+class Topology:
+    """Socket / NUMA node / core / hardware thread map of the online cpus"""
+
+    def __init__(self, threads):
+        self.threads = sorted(threads, key=lambda t: t.cpu)
+
+    @classmethod
+    def from_sysfs(cls, root=SYSFS):
+        root = Path(root)
+        online = parse_cpulist((root / "cpu/online").read_text())
+
+        node_of = {}
+        for node_dir in root.glob("node/node[0-9]*"):
+            node = int(node_dir.name[4:])
+            for cpu in parse_cpulist((node_dir / "cpulist").read_text()):
+                node_of[cpu] = node
+
+        threads = []
+        for cpu in online:
+            topo = root / f"cpu/cpu{cpu}/topology"
+            siblings = parse_cpulist((topo / "thread_siblings_list").read_text())
+            threads.append(
+                HwThread(
+                    cpu=cpu,
+                    socket=int((topo / "physical_package_id").read_text()),
+                    core=int((topo / "core_id").read_text()),
+                    node=node_of.get(cpu, 0),
+                    smt=siblings.index(cpu) if cpu in siblings else 0,
+                )
+            )
+        return cls(threads)
+
+    @property
+    def sockets(self):
+        return sorted({t.socket for t in self.threads})
+
+    @property
+    def nodes(self):
+        return sorted({t.node for t in self.threads})
+
+    @property
+    def physical_cores(self):
+        return [t for t in self.threads if t.smt == 0]
+
+    def summary(self):
+        return {
+            "sockets": len(self.sockets),
+            "numa_nodes": len(self.nodes),
+            "physical_cores": len(self.physical_cores),
+            "threads": len(self.threads),
+        }
+
+    def core_rank(self):
+        """Index of each (socket, core) within its socket, core_id can have gaps"""
+        rank = {}
+        for socket in self.sockets:
+            cores = sorted({t.core for t in self.threads if t.socket == socket})
+            rank.update({(socket, c): i for i, c in enumerate(cores)})
+        return rank
+
+    def plan(self, cores, layout="compact"):
+        """Logical cpu ids to use for cores processes, in placement order
+
+        compact:  fill the physical cores of one socket, then its SMT
+                  siblings, before moving to the next socket
+        scatter:  spread round-robin over the sockets, physical cores first
+        physical: one hardware thread per physical core, socket order
+        """
+
+        rank = self.core_rank()
+        if layout == "compact":
+            order = sorted(
+                self.threads, key=lambda t: (t.socket, t.smt, rank[t.socket, t.core])
+            )
+        elif layout == "scatter":
+            order = sorted(
+                self.threads, key=lambda t: (t.smt, rank[t.socket, t.core], t.socket)
+            )
+        elif layout == "physical":
+            order = sorted(
+                self.physical_cores, key=lambda t: (t.socket, rank[t.socket, t.core])
+            )
+        else:
+            raise Exception(f"Unknown layout {layout}, use one of {LAYOUTS}")
+
+        if cores > len(order):
+            raise Exception(
+                f"Layout {layout} has only {len(order)} cpus, {cores} requested"
+            )
+        return [t.cpu for t in order[:cores]]
+
+    def describe(self, cpus, layout):
+        """Pin layout record for a result"""
+        used = [t for t in self.threads if t.cpu in set(cpus)]
+        return {
+            "layout": layout,
+            "cpus": format_cpulist(cpus),
+            "sockets": sorted({t.socket for t in used}),
+            "numa_nodes": sorted({t.node for t in used}),
+            "physical_cores": len({(t.socket, t.core) for t in used}),
+        }
+
+    def gromacs_pin(self, cpus):
+        """mdrun pinning as (launch prefix, mdrun flags)
+
+        mdrun counts -pinoffset/-pinstride in its own hardware thread order,
+        cores in socket order with their SMT siblings next to each other. A
+        layout that is not evenly strided in that order is applied with
+        taskset instead.
+        """
+
+        rank = self.core_rank()
+        order = sorted(
+            self.threads, key=lambda t: (t.socket, rank[t.socket, t.core], t.smt)
+        )
+        index = sorted(i for i, t in enumerate(order) if t.cpu in set(cpus))
+        strides = {b - a for a, b in zip(index, index[1:])}
+        if len(strides) <= 1:
+            stride = strides.pop() if strides else 1
+            return [], f"-pin on -pinoffset {index[0]} -pinstride {stride}".split()
+        return ["taskset", "-c", format_cpulist(cpus)], ["-pin", "off"]
+
+
+def namd_pin_args(cpus, comm_cpus=None):
+    """+pemap (and +commap for communication threads) for a cpu list"""
+    args = ["+pemap", format_cpulist(cpus)]
+    if comm_cpus:
+        args += ["+commap", format_cpulist(comm_cpus)]
+    return args
+
+
+def split_cpus(cpus, parts):
+    """Split a cpu list into parts equal blocks for concurrent instances"""
+    per = len(cpus) // parts
+    return [cpus[k * per : (k + 1) * per] for k in range(parts)]
+
+
+def plan_layout(cores, layout):
+    """Topology and cpu list for a --layout, cores defaults to the physical cores"""
+    topology = Topology.from_sysfs()
+    if cores is None:
+        cores = len(topology.physical_cores)
+    return topology, topology.plan(cores, layout)
+
+
+if __name__ == "__main__":
+    topology = Topology.from_sysfs()
+    print(topology.summary())
+    for layout in LAYOUTS:
+        cpus = topology.plan(len(topology.physical_cores), layout)
+        print(f"{layout:8} : {format_cpulist(cpus)}")
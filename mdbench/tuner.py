@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Launch parameter tuning with successive halving
+
+Every candidate configuration gets a short run, the better half goes on to
+runs twice as long, up to the length of a full benchmark run, and so on
+until one is left. The winner is kept per
+(engine, job, cores, gpus, host) in a JSON file the runner reads back, so
+later benchmarks of the same job on the same machine use it.
+"""
+
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+
+from .capture import run_cmd_rtn_out
+from .results_store import now_iso
+from .topology import plan_layout
+
+TUNED_FILE = Path("tuned.json")
+
+
+class TunedConfigs:
+    """Best configuration per (engine, job, cores, gpus) for one host"""
+
+    def __init__(self, path=TUNED_FILE, host=None):
+        self.path = Path(path)
+        self.host = host
+
+    def _key(self, engine, job, cores, gpus):
+        return f"{engine}|{job}|{cores}|{gpus}|{self.host}"
+
+    def _load(self):
+        try:
+            return json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return {}
+
+    def get(self, engine, job, cores, gpus):
+        return self._load().get(self._key(engine, job, cores, gpus))
+
+    def put(self, engine, job, cores, gpus, entry):
+        tuned = self._load()
+        tuned[self._key(engine, job, cores, gpus)] = entry
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(tuned, indent=4))
+        tmp.replace(self.path)
+
+
+def successive_halving(configs, evaluate, min_budget, eta=2, max_budget=None):
+    """Best first [(score, config)] of the last round and every round's scores
+
+    evaluate(config, budget) returns a higher is better score, or None for a
+    configuration that failed, which is dropped. The budget grows by eta each
+    round until it reaches max_budget, later rounds stay there.
+    """
+    rung, budget, rounds = list(configs), min_budget, []
+    while True:
+        scored = [(evaluate(config, budget), config) for config in rung]
+        ranked = sorted(
+            [(s, c) for s, c in scored if s is not None],
+            key=lambda sc: sc[0],
+            reverse=True,
+        )
+        rounds.append(
+            {
+                "budget": budget,
+                "scores": [
+                    {"config": c, "score": round(s, 5) if s is not None else None}
+                    for s, c in scored
+                ],
+            }
+        )
+        keep = len(ranked) // eta
+        if keep <= 1:  # the best of this round wins
+            return ranked, rounds
+        rung = [c for _, c in ranked[:keep]]
+        if max_budget is None or budget * eta <= max_budget:
+            budget *= eta
+        elif budget < max_budget:
+            budget = max_budget
+
+
+def config_str(config):
+    return " ".join(f"{k}={v}" for k, v in config.items()) or "default"
+
+
+def autotune(
+    engine,
+    job,
+    cores=None,
+    gpus=None,
+    layout=None,
+    log_dir="logs",
+    min_steps=None,
+    tuned=None,
+    silent=False,
+    watchdog=None,
+):
+    """Search engine.tune_space() for job with successive halving
+
+    The winner is saved to tuned (a TunedConfigs) and returned as the
+    entry that was saved. Runs that fail or that the watchdog (as for
+    run_single) terminates are dropped.
+    """
+
+    gpus = engine.default_gpus if gpus is None else gpus
+
+    topology, cpus = None, None
+    if layout:
+        topology, cpus = plan_layout(cores, layout)
+        cores = len(cpus)
+    elif cores is None:  # set to all threads
+        cores = os.cpu_count()
+
+    configs = engine.tune_space(cores, gpus)
+    if len(configs) < 2:
+        print(f"\n{engine.name} has no launch parameters to tune for {job}")
+        return None
+    full_steps = engine.steps(job)
+    if not min_steps:
+        min_steps = (
+            max(1, full_steps // engine.tune_fraction)
+            if full_steps
+            else engine.tune_steps
+        )
+    cwd, env = engine.cwd(job), engine.env(gpus, cores)
+    runs = itertools.count()
+    last_samples = {}
+
+    def evaluate(config, nsteps):
+        commandline = engine.commandline(
+            job, cores, gpus, cpus, topology, config=config, nsteps=nsteps
+        )
+        log_path = (
+            Path(log_dir) / f"{job}-{engine.core_tag}{cores}-tune{next(runs)}.log"
+        )
+        parser = engine.parser()
+        run_cmd, state = engine.prepare(job, commandline)
+        start_time = time.perf_counter()
+        run_log, rtn_code = run_cmd_rtn_out(
+            run_cmd,
+            log_path,
+            sys_env=env,
+            echo=False,
+            parsers=[parser],
+            cwd=cwd,
+            **(watchdog or {}),
+        )
+        engine.finish(state, parser, log_path, time.perf_counter() - start_time)
+        failed = rtn_code != 0 or run_log.killed
+        samples = engine.samples(parser) if not failed else []
+        last_samples[config_str(config)] = samples
+        score = engine.rate(samples) if samples else None
+        if not silent:
+            print(f"{job} {nsteps or '':>7} steps  {config_str(config):40} {score}")
+        return score
+
+    print(f"\nTuning {job} on {cores} cores: {len(configs)} configurations")
+    ranked, rounds = successive_halving(
+        configs, evaluate, min_steps, max_budget=full_steps
+    )
+    if not ranked:
+        print(f"\nError: every configuration of {job} failed, nothing tuned")
+        return None
+
+    _, best = ranked[0]
+    performance = engine.repeat_performance(last_samples[config_str(best)])
+    entry = {
+        "timestamp": now_iso(),
+        "config": best,
+        "commandline": " ".join(
+            engine.commandline(job, cores, gpus, cpus, topology, config=best)
+        ),
+        "performance": round(performance, 5),
+        "performance_unit": engine.performance_unit(job),
+        "rounds": rounds,
+    }
+    print(
+        f"\nBest for {job} on {cores} cores: {config_str(best)} "
+        f"{entry['performance']} {entry['performance_unit']}\n{entry['commandline']}"
+    )
+    if tuned is not None:
+        tuned.put(engine.name, job, cores, gpus, entry)
+    return entry
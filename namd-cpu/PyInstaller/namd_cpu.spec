@@ -5,7 +5,7 @@ block_cipher = None
 
 
 a = Analysis(['../namd_cpu.py'],
-             pathex=[],
+             pathex=['../..'],
              binaries=[],
              datas=[],
              hiddenimports=[],
@@ -5,7 +5,7 @@ block_cipher = None
 
 
 a = Analysis(['../namd_gpu.py'],
-             pathex=[],
+             pathex=['../..'],
              binaries=[],
              datas=[],
              hiddenimports=[],
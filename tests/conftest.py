@@ -0,0 +1,36 @@
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+# the mdbench package, and the root meta_data.py the runner imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mdbench.engines import GromacsEngine  # noqa: E402
+
+# ns/day by where PME runs, nonbonded on the GPU doubles the CPU figure
+STUB_GMX = """
+import sys
+args = sys.argv[1:]
+where = lambda flag: args[args.index(flag) + 1] if flag in args else "cpu"
+ns_per_day = 10.0 * (2 if where("-nb") == "gpu" else 1)
+ns_per_day *= 1.5 if where("-pme") == "gpu" else 1
+print("               Core t (s)   Wall t (s)        (%)")
+print("       Time:        1.000        1.000      100.0")
+print("                 (ns/day)    (hour/ns)")
+print(f"Performance:   {ns_per_day:10.3f}   {24 / ns_per_day:10.3f}")
+"""
+
+
+@pytest.fixture
+def stub_gromacs(tmp_path, monkeypatch):
+    """GromacsEngine running a stub gmx on a PEP job in tmp_path"""
+    stub = tmp_path / "gmx.py"
+    stub.write_text(textwrap.dedent(STUB_GMX))
+    (tmp_path / "gromacs" / "PEP").mkdir(parents=True)
+    (tmp_path / "gromacs" / "PEP" / "benchPEP.tpr").write_bytes(b"")
+    (tmp_path / "logs").mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("PATH", "")  # no nvidia-smi, nv_gpuinfo() gives None
+    return GromacsEngine(gmx=f"{sys.executable} {stub}")
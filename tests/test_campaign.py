@@ -0,0 +1,67 @@
+import json
+
+from mdbench.campaign import Estimator, Progress, expand, interleave, schedule
+from mdbench.engines import ReplayEngine
+from mdbench.journal import CampaignJournal
+from mdbench.results_store import open_store
+from mdbench.runner import campaign_keys, run_campaign
+
+
+def eta(capsys):
+    return capsys.readouterr().out.split("ETA ")[1].split()[0]
+
+
+def test_progress_corrects_by_finished_units(capsys):
+    progress = Progress([10.0, 10.0, 10.0])
+    progress.start(0, "a")
+    assert eta(capsys) == "0:00:30"
+    progress.finish(0, 20.0)  # took twice the estimate
+    progress.start(1, "b")
+    assert eta(capsys) == "0:00:40"
+
+
+def test_progress_with_zero_estimates(capsys):
+    progress = Progress([0.0, 0.0, 60.0])
+    progress.start(0, "a")
+    progress.finish(0, 5.0)
+    progress.start(1, "b")  # nothing to correct by yet
+    assert eta(capsys) == "0:01:00"
+
+
+def test_interleave_blocks():
+    units = [{"repeats": 3}, {"repeats": 1}, {"repeats": 2}]
+    order = interleave(units, seed=7)
+    blocks = [sorted(k for b, k in order if b == block) for block in range(3)]
+    assert blocks == [[0, 1, 2], [0, 2], [0]]
+    assert [b for b, _ in order] == sorted(b for b, _ in order)
+    assert interleave(units, seed=7) == order
+    assert len({tuple(interleave(units, seed)) for seed in range(20)}) > 1
+
+
+def test_run_campaign_interleaved(tmp_path):
+    engine = ReplayEngine("namd", 300, seed=0)
+    spec = {"matrix": [{"jobs": "synthetic", "cores": [1, 2], "repeats": 3}]}
+    units = schedule(expand(spec, engine), Estimator([], engine))
+    store = open_store(tmp_path / "r.jsonl")
+    store.start_campaign({}, {})
+    run = {"silent": True, "sample_interval": 0, "thermal_interval": 0}
+    journal = CampaignJournal(tmp_path / "r.jsonl.journal")
+    journal.start(store.campaign["campaign_id"], campaign_keys(engine, units, run), 7)
+    (tmp_path / "logs").mkdir()
+
+    results = run_campaign(
+        engine, units, store, journal, seed=7, log_dir=tmp_path / "logs", **run
+    )
+
+    records = [json.loads(line) for line in open(journal.path)][1:]  # the units
+    ran = [r["key"] for r in records if not r["key"].endswith("result")]
+    cores = [u["cores"] for u in units]
+    assert ran == [
+        f"synthetic|{cores[k]}|None|None|r{b}" for b, k in interleave(units, 7)
+    ]
+    for result in results:
+        assert result["interleave"]["seed"] == 7
+        assert len(result["performance_samples"]) == 3
+    assert sorted(s for r in results for s in r["interleave"]["sequence"]) == list(
+        range(6)
+    )
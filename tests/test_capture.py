@@ -0,0 +1,119 @@
+import os
+import signal
+import sys
+import threading
+import time
+
+import pytest
+
+from mdbench import capture
+from mdbench.capture import run_cmd_rtn_out, run_cmds_concurrently
+
+posix_only = pytest.mark.skipif(os.name != "posix", reason="process groups")
+
+SLEEPER = "import time; print('up', flush=True); time.sleep(60)"
+STUBBORN = "import signal; signal.signal(signal.SIGTERM, signal.SIG_IGN); " + SLEEPER
+
+
+class Lines:
+    def __init__(self):
+        self.lines = []
+
+    def feed(self, line):
+        self.lines.append(line)
+
+
+class Ignore:
+    def feed(self, line):
+        pass
+
+
+class Interrupt:
+    """Parser that interrupts the capture on the first line, like Ctrl-C"""
+
+    def feed(self, line):
+        raise KeyboardInterrupt
+
+
+def test_streams_to_the_log_and_keeps_a_tail(tmp_path, capfd):
+    script = "import sys; sys.stdout.write('\\n'.join(map(str, range(1000))))"
+    parser = Lines()
+    run_log, rtn_code = run_cmd_rtn_out(
+        [sys.executable, "-c", script],
+        tmp_path / "logs" / "run.log",
+        echo=False,
+        tail_lines=5,
+        parsers=[parser],
+    )
+    assert rtn_code == 0
+    assert list(run_log.lines()) == [str(k) for k in range(1000)]
+    assert run_log.num_bytes == run_log.path.stat().st_size
+    assert [line.decode() for line in run_log.tail] == [
+        "995",
+        "996",
+        "997",
+        "998",
+        "999",
+    ]
+    assert parser.lines == [str(k) for k in range(1000)]  # the last, unterminated, too
+    assert capfd.readouterr().out == ""
+
+
+def test_echo_and_tail_on_failure(tmp_path, capfd):
+    script = "import sys; print('one'); print('two'); sys.exit(3)"
+    cmd = [sys.executable, "-c", script]
+    _, rtn_code = run_cmd_rtn_out(cmd, tmp_path / "echo.log")
+    assert rtn_code == 3
+    assert capfd.readouterr().out.splitlines() == ["one", "two"]
+
+    _, rtn_code = run_cmd_rtn_out(cmd, tmp_path / "quiet.log", echo=False, tail_lines=1)
+    assert rtn_code == 3
+    out = capfd.readouterr().out
+    assert "Last 1 lines of" in out and out.splitlines()[-1] == "two"
+    assert "one" not in out
+
+
+@posix_only
+def test_interrupt_does_not_wait_out_the_grace(tmp_path):
+    threads = threading.active_count()
+    start = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        run_cmd_rtn_out(
+            [sys.executable, "-c", SLEEPER],
+            tmp_path / "run.log",
+            echo=False,
+            parsers=[Interrupt()],
+            timeout=60,  # with a watchdog, which must be stopped too
+            kill_grace=10,
+        )
+    assert time.monotonic() - start < 5
+    assert capture.RUNNING == {}
+    assert threading.active_count() == threads
+
+
+@posix_only
+def test_interrupt_shares_the_grace_between_instances(tmp_path):
+    cmds = [[sys.executable, "-c", STUBBORN]] * 3
+    logs = [tmp_path / f"i{k}.log" for k in range(3)]
+    timer = threading.Timer(1.0, os.kill, (os.getpid(), signal.SIGINT))
+    timer.start()
+    start = time.monotonic()
+    with pytest.raises(KeyboardInterrupt):
+        run_cmds_concurrently(cmds, logs, [Ignore()] * 3, kill_grace=1.0)
+    assert time.monotonic() - start < 1.0 + 2.5  # not 3 x the grace
+    assert capture.RUNNING == {}
+
+
+@posix_only
+def test_watchdog_timeout(tmp_path):
+    start = time.monotonic()
+    run_log, rtn_code = run_cmd_rtn_out(
+        [sys.executable, "-c", SLEEPER],
+        tmp_path / "run.log",
+        echo=False,
+        timeout=0.5,
+        kill_grace=10,
+    )
+    assert run_log.killed == "timeout"
+    assert rtn_code == -signal.SIGTERM
+    assert time.monotonic() - start < 5
@@ -0,0 +1,58 @@
+import pytest
+
+from mdbench.compare import load_samples
+from mdbench.results_store import open_store
+
+
+def result(samples, unit="ns/day", **fields):
+    return {
+        "name": "apoa1",
+        "num_processes": 8,
+        "gpu_index_used": None,
+        "performance_samples": samples,
+        "performance_unit": unit,
+        **fields,
+    }
+
+
+def test_load_samples_keeps_launches_apart(tmp_path):
+    store = open_store(tmp_path / "r.jsonl")
+    store.start_campaign({}, {})
+    store.append(
+        [
+            result([0.04, 0.041], unit="days/ns"),
+            result([50.0, 51.0], instances=2),
+            result([80.0], launch_config={"nb": "gpu", "pme": "gpu"}),
+            result([60.0], launch_config={"pme": "cpu", "nb": "gpu"}),
+        ]
+    )
+    samples = load_samples(store.path)
+    assert samples == {
+        ("apoa1", 8, None, None, None): ("days/ns", [0.04, 0.041]),
+        ("apoa1", 8, None, 2, None): ("ns/day", [50.0, 51.0]),
+        ("apoa1", 8, None, None, "nb=gpu pme=gpu"): ("ns/day", [80.0]),
+        ("apoa1", 8, None, None, "nb=gpu pme=cpu"): ("ns/day", [60.0]),
+    }
+
+
+def test_load_samples_latest_campaign_by_default(tmp_path):
+    store = open_store(tmp_path / "r.jsonl")
+    first = store.start_campaign({}, {})
+    store.append([result([10.0])])
+    store.start_campaign({}, {})
+    store.append([result([20.0])])
+
+    key = ("apoa1", 8, None, None, None)
+    assert load_samples(store.path)[key][1] == [20.0]
+    assert load_samples(store.path, first)[key][1] == [10.0]
+    assert load_samples(store.path, "all")[key][1] == [10.0, 20.0]
+    with pytest.raises(ValueError):
+        load_samples(store.path, "nope")
+
+
+def test_load_samples_refuses_mixed_units(tmp_path):
+    store = open_store(tmp_path / "r.jsonl")
+    store.start_campaign({}, {})
+    store.append([result([10.0]), result([0.1], unit="days/ns")])
+    with pytest.raises(ValueError, match="days/ns"):
+        load_samples(store.path)
@@ -0,0 +1,61 @@
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import pytest
+
+from mdbench import engines
+from mdbench.engines import Engine, GromacsEngine
+
+BANNER = """#!{python}
+from pathlib import Path
+with open(Path(__file__).with_suffix(".runs"), "a") as f:
+    f.write("run\\n")
+print("Info: NAMD 2.14 for Linux-x86_64-multicore")
+"""
+
+
+@pytest.mark.skipif(os.name != "posix", reason="runs a script as the binary")
+def test_version_is_cached_per_binary(tmp_path, monkeypatch):
+    monkeypatch.setattr(engines, "VERSION_CACHE", tmp_path / "cache" / "v.json")
+    binary = tmp_path / "namd2"
+    binary.write_text(BANNER.format(python=sys.executable))
+    binary.chmod(0o755)
+    runs = tmp_path / "namd2.runs"
+    engine = Engine()
+    engine.binary = binary
+
+    version = {"name": "NAMD", "build": "Linux-x86_64-multicore", "version": "2.14"}
+    assert engine.version() == version
+    assert engine.version() == version
+    assert len(runs.read_text().splitlines()) == 1
+
+    stat = binary.stat()
+    os.utime(binary, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))  # rebuilt
+    assert engine.version() == version
+    assert len(runs.read_text().splitlines()) == 2
+
+    engine.binary = tmp_path / "missing"
+    assert engine.version() is None
+
+
+MD_LOG = Path(__file__).parent / "data" / "md.log"
+
+
+@pytest.mark.parametrize("mdlog", ["keep", "discard"])
+def test_each_gromacs_run_gets_its_own_scratch_dir(tmp_path, mdlog):
+    engine = GromacsEngine(scratch=tmp_path / "shm", mdlog=mdlog, gmx="gmx")
+    log_path = tmp_path / "logs" / "PEP-p4-r0.log"
+    log_path.parent.mkdir()
+    cmd, run_dir = engine.prepare("PEP", ["gmx", "mdrun"])
+    _, other = engine.prepare("PEP", ["gmx", "mdrun"])  # a concurrent run
+    assert run_dir != other and run_dir.parent == other.parent == tmp_path / "shm"
+    assert cmd[-2:] == ["-deffnm", str(run_dir / "md")]
+
+    shutil.copy(MD_LOG, run_dir / "md.log")
+    (run_dir / "md.edr").write_bytes(b"")
+    cycles = engine.finish(run_dir, None, log_path, 1.0)
+    assert cycles["total_wall_s"] == 15.402
+    assert not run_dir.exists() and other.exists()
+    assert log_path.with_suffix(".md.log").exists() == (mdlog == "keep")
@@ -0,0 +1,85 @@
+import json
+
+from mdbench.campaign import expand
+from mdbench.engines import NamdEngine, ReplayEngine
+from mdbench.journal import CampaignJournal, unit_key
+from mdbench.results_store import open_store
+from mdbench.runner import campaign_keys, run_job, unit_kwargs
+
+RUN = {
+    "repeats": 2,
+    "cores": 1,
+    "silent": True,
+    "sample_interval": 0,
+    "thermal_interval": 0,
+}
+
+
+def test_journal_load_skips_torn_line(tmp_path):
+    journal = CampaignJournal(tmp_path / "r.jsonl.journal")
+    keys = [unit_key("apoa1", 4, None, None, u) for u in ["r0", "r1", "result"]]
+    journal.start("c1", keys)
+    journal.finish(keys[0], {"elapsed": 1.0})
+    with open(journal.path, "a") as f:
+        f.write('{"type": "unit", "key": "apoa1|4|Non')  # killed mid write
+
+    resumed = CampaignJournal(journal.path)
+    assert resumed.load()
+    assert resumed.campaign_id == "c1"
+    assert resumed.get(keys[0]) == {"elapsed": 1.0}
+    assert resumed.remaining() == keys[1:]
+
+
+def test_unit_key_with_config():
+    assert unit_key("PEP", 8, "0", None, "r0") == "PEP|8|0|None|r0"
+    assert unit_key("PEP", 8, "0", None, "r0", {"pme": "gpu", "nb": "gpu"}) == (
+        'PEP|8|0|None|{"nb": "gpu", "pme": "gpu"}|r0'
+    )
+
+
+def test_resume_runs_only_missing_repeats(tmp_path):
+    engine = ReplayEngine("namd", 300, seed=0)
+    store = open_store(tmp_path / "r.jsonl")
+    store.start_campaign({}, {})
+    journal = CampaignJournal(tmp_path / "r.jsonl.journal")
+    journal.start(store.campaign["campaign_id"], [])
+    logs = tmp_path / "logs"
+    logs.mkdir()
+    run = dict(RUN, store=store, log_dir=logs)
+
+    first = run_job(engine, "synthetic", journal=journal, **run)
+    assert first["performance"] is not None
+
+    # interrupted after the first repeat: keep the campaign and r0 lines only
+    lines = journal.path.read_text().splitlines(keepends=True)
+    journal.path.write_text("".join(lines[:2]))
+    for log in logs.iterdir():
+        log.unlink()
+
+    resumed = CampaignJournal(journal.path)
+    assert resumed.load()
+    result = run_job(engine, "synthetic", journal=resumed, **run)
+    assert sorted(p.name for p in logs.iterdir()) == ["synthetic-p1-r1.log"]
+    assert result["performance_samples"][:1] == first["performance_samples"][:1]
+
+    # the result is journaled once written, a second resume skips the job
+    assert run_job(engine, "synthetic", journal=resumed, **run) is None
+    records = [json.loads(line) for line in open(store.path)]
+    assert [r["type"] for r in records] == ["campaign", "result", "result"]
+
+
+def test_campaign_keys_match_run_job(tmp_path):
+    engine = NamdEngine(gpu=True)  # default_gpus 0
+    units = expand({"matrix": [{"jobs": "apoa1", "cores": [4, 8]}]}, engine)
+    kwargs = {"gpus": engine.default_gpus, "repeats": 3}
+    keys = campaign_keys(engine, units, kwargs)
+    assert keys[0] == "apoa1|4|0|None|r0"
+
+    journal = CampaignJournal(tmp_path / "r.jsonl.journal")
+    journal.start("c1", keys)
+    settings = unit_kwargs(engine, units[0], kwargs)
+    scope = journal.scope(
+        "apoa1", settings["cores"], settings["gpus"], None, settings["config"]
+    )
+    scope.finish("r0")
+    assert keys[0] not in journal.remaining()
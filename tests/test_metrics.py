@@ -0,0 +1,82 @@
+from pathlib import Path
+
+import pytest
+
+from mdbench.metrics import (
+    BenchmarkSample,
+    GromacsParser,
+    LammpsParser,
+    LammpsPerformance,
+    Memory,
+    NamdParser,
+    Performance,
+    Timing,
+    WallClock,
+    cycle_accounting,
+    parse_cycle_accounting,
+)
+
+DATA = Path(__file__).parent / "data"
+
+
+def parse(parser, name):
+    with open(DATA / name) as f:
+        for line in f:
+            parser.feed(line)
+    return parser
+
+
+def test_namd_parser():
+    parser = parse(NamdParser(), "namd.log")
+    assert parser.of_type(BenchmarkSample) == [
+        BenchmarkSample(36, 0.00716, 0.0414),
+        BenchmarkSample(36, 0.00711, 0.0411),
+    ]
+    assert parser.of_type(Memory)[0].mb == 1001.53
+    assert [t.step for t in parser.of_type(Timing)] == [500, 1000, 1500]
+    assert parser.of_type(Timing)[1].wall_s_per_step == 0.00712
+    assert parser.of_type(WallClock) == [WallClock(12.3, 12.1)]
+
+
+def test_namd_summary():
+    summary = parse(NamdParser(), "namd.log").summary(wall_s=12.5)
+    assert summary["startup_time"] == 1.84212
+    assert summary["s_per_step"] == pytest.approx(0.007115)  # first TIMING: left out
+    assert summary["engine_wallclock"] == 12.3
+    assert summary["harness_overhead"] == 0.2
+    assert summary["stability"]["settling_step"] == 500
+
+
+def test_gromacs_parser():
+    parser = parse(GromacsParser(), "md.log")
+    assert parser.of_type(Performance) == [Performance(280.512, 0.086)]
+    assert parser.of_type(WallClock) == [WallClock(wall_s=15.402, cpu_s=246.43)]
+
+
+def test_lammps_parser():
+    parser = parse(LammpsParser(), "lammps.log")
+    assert parser.of_type(LammpsPerformance) == [LammpsPerformance(17280.0, 40.0)]
+
+
+def test_parse_cycle_accounting():
+    with open(DATA / "md.log") as f:
+        cycles = parse_cycle_accounting(f)
+    assert cycles["total_wall_s"] == 15.402
+    assert cycles["phases"]["Force"] == {"wall_s": 8.413, "percent": 54.6}
+    assert cycles["phases"]["PME mesh"] == {"wall_s": 10.201, "percent": 22.1}
+    assert "Total" not in cycles["phases"]
+    assert cycles["breakdowns"]["PME mesh activities"]["PME spread"]["percent"] == 6.1
+    assert cycles["load_imbalance_percent"] == 3.2
+    assert cycles["load_imbalance_wait_percent"] == 2.3
+    assert cycles["pme_mesh_force_load"] == 0.845
+    assert cycles["pme_pp_wait_percent"] == 1.9
+    # only notes of the load balancing report, joined over their lines
+    assert len(cycles["notes"]) == 1
+    assert cycles["notes"][0].startswith("NOTE: 7.9 % of the run time")
+    assert cycles["notes"][0].endswith("(this has no effect on accuracy)")
+
+
+def test_cycle_accounting_without_table(tmp_path):
+    assert cycle_accounting(tmp_path / "missing.log") is None
+    with open(DATA / "namd.log") as f:
+        assert parse_cycle_accounting(f) is None
@@ -0,0 +1,68 @@
+import pytest
+
+from mdbench import preflight as pf
+from mdbench.preflight import check, preflight
+
+BUSY = [(4242, "make", 95.0), (7, "sshd", 0.5)]
+
+
+@pytest.fixture
+def machine(monkeypatch):
+    """A machine with the load, governors and, one per look, busy processes
+    the test sets"""
+    state = {"load": 0.1, "consumers": [], "governors": ["performance"]}
+    monkeypatch.setattr(pf.os, "getloadavg", lambda: (state["load"], 0.0, 0.0))
+    monkeypatch.setattr(
+        pf,
+        "top_consumers",
+        lambda interval: state["consumers"].pop(0) if state["consumers"] else [],
+    )
+    monkeypatch.setattr(pf, "governors", lambda: state["governors"])
+    monkeypatch.setattr(pf.time, "sleep", lambda seconds: None)
+    return state
+
+
+def test_check_lists_the_issues(machine):
+    machine.update(load=3.5, consumers=[BUSY], governors=["powersave"])
+    report = check(max_load=1.0, max_busy=20.0, governor="performance")
+    assert report["issues"] == [
+        "load average 3.50 > 1.0",
+        "make (pid 4242) using 95.0% cpu",
+        "cpufreq governor powersave, not performance",
+    ]
+    assert report["busy"]
+    assert report["top_consumers"][0] == {
+        "pid": 4242,
+        "comm": "make",
+        "cpu_percent": 95.0,
+    }
+
+
+def test_quiet_machine_passes(machine):
+    for action in ["warn", "wait", "abort"]:
+        report = preflight(action)
+        assert report["ok"] and report["issues"] == []
+    assert preflight("off") is None
+
+
+def test_busy_machine(machine):
+    machine["consumers"] = [BUSY] * 10
+    assert preflight("warn")["ok"]
+    assert not preflight("abort")["ok"]
+    assert not preflight("wait", timeout=0)["ok"]
+
+
+def test_wait_until_the_machine_settles(machine, capsys):
+    machine["consumers"] = [BUSY, BUSY, []]  # the build finishes
+    report = preflight("wait", timeout=300, poll=0)
+    assert report["ok"] and report["issues"] == []
+    assert capsys.readouterr().out.count("Pre-flight: waiting") == 2
+
+
+def test_governor_is_not_waited_for(machine):
+    machine["governors"] = ["ondemand"]
+    report = preflight("wait", poll=0)
+    assert report["ok"] and not report["busy"]
+    assert report["issues"] == ["cpufreq governor ondemand, not performance"]
+    assert not preflight("abort")["ok"]
+    assert preflight("abort", governor="")["ok"]
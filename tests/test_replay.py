@@ -0,0 +1,53 @@
+import io
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+from mdbench.capture import feed_parsers
+from mdbench.engines import ReplayEngine
+from mdbench.harness_bench import bench_case
+from mdbench.replay import FORMATS, emit, synthetic_lines
+
+DATA = Path(__file__).parent / "data"
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_synthetic_output_parses_as_the_engine(fmt):
+    engine = ReplayEngine(fmt, seed=1)
+    lines = list(synthetic_lines(fmt, 1000, seed=1))
+    assert len(lines) == pytest.approx(1000, abs=5)
+    assert lines == list(synthetic_lines(fmt, 1000, seed=1))
+    parser = engine.parser()
+    feed_parsers([parser], [line.encode() for line in lines])
+    assert engine.rate(engine.samples(parser)) > 0
+
+
+def test_replays_a_captured_log():
+    replay = Path(__file__).parent.parent / "mdbench" / "replay.py"
+    out = subprocess.run(
+        [sys.executable, replay, "--file", DATA / "namd.log"],
+        capture_output=True,
+        check=True,
+    ).stdout
+    assert out.splitlines() == (DATA / "namd.log").read_bytes().splitlines()
+
+
+def test_emit_paces_the_lines():
+    out = io.StringIO()
+    start = time.perf_counter()
+    assert emit((str(k) for k in range(300)), rate=1000, out=out) == 300
+    assert time.perf_counter() - start >= 0.25
+    assert out.getvalue().splitlines() == [str(k) for k in range(300)]
+
+
+def test_bench_case_reports_overheads(tmp_path):
+    case = bench_case("gromacs", 2000, repeats=2, work_dir=tmp_path)
+    assert case["lines"] == pytest.approx(2000, abs=5)
+    assert case["performance"] > 0
+    for key in ["capture_us_per_line", "parse_us_per_line", "run_single_overhead_s"]:
+        assert case[key] >= 0
+    assert case["parse_us_per_line"] > 0
+    assert case["peak_heap_kb"] > 0
@@ -0,0 +1,116 @@
+import json
+import sys
+
+import pytest
+
+from mdbench import results_store
+from mdbench.results_store import export_json, open_store
+
+META = {"benchmark_name": "NAMD2-CPU"}
+SPECS = {"os": "Linux", "cpu": "Test CPU"}
+
+
+def result(job, cores, gpus=None, performance=1.0):
+    return {
+        "name": job,
+        "num_processes": cores,
+        "gpu_index_used": gpus,
+        "performance": performance,
+        "performance_unit": "days/ns",
+    }
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".db", ".json"])
+def test_append_and_query(tmp_path, suffix):
+    store = open_store(tmp_path / f"results{suffix}")
+    campaign_id = store.start_campaign(META, SPECS)
+    store.append([result("apoa1", 4), result("apoa1", 8, 0), result("stmv", 8)])
+
+    reopened = open_store(store.path)
+    [campaign] = reopened.campaigns()
+    assert campaign["campaign_id"] == campaign_id
+    assert campaign["meta"] == META
+    assert [r["result"]["name"] for r in reopened.results()] == [
+        "apoa1",
+        "apoa1",
+        "stmv",
+    ]
+    assert [r["cores"] for r in reopened.results(job="apoa1")] == [4, 8]
+    assert [r["job"] for r in reopened.results(campaign_id, cores=8)] == [
+        "apoa1",
+        "stmv",
+    ]
+    assert [r["cores"] for r in reopened.results(gpus="0")] == [8]
+
+
+@pytest.mark.parametrize("suffix", [".jsonl", ".db"])
+def test_campaigns_are_kept_and_resumed(tmp_path, suffix):
+    store = open_store(tmp_path / f"results{suffix}")
+    first = store.start_campaign(META, SPECS)
+    store.append([result("apoa1", 4)])
+    second = store.start_campaign(META, SPECS)
+    store.append([result("apoa1", 8)])
+
+    reopened = open_store(store.path)
+    assert [c["campaign_id"] for c in reopened.campaigns()] == [first, second]
+    assert reopened.resume_campaign(first)
+    assert not reopened.resume_campaign("nope")
+    reopened.append([result("stmv", 4)])
+    assert [r["job"] for r in reopened.results(first)] == ["apoa1", "stmv"]
+
+
+def test_jsonl_recovers_from_a_torn_last_line(tmp_path):
+    store = open_store(tmp_path / "results.jsonl")
+    store.start_campaign(META, SPECS)
+    store.append([result("apoa1", 4)])
+    with open(store.path, "a") as f:
+        f.write('{"type": "result", "campaign_id": "x", "job": "ap')  # crash
+
+    store.append([result("stmv", 8)])
+    assert [r["job"] for r in open_store(store.path).results()] == ["apoa1", "stmv"]
+    assert store.path.read_text().count("\n") == 4  # the torn line on its own
+
+
+def test_export_json_legacy_layout(tmp_path):
+    store = open_store(tmp_path / "results.jsonl")
+    store.start_campaign(META, SPECS)
+    store.append([result("apoa1", 4)])
+    latest = store.start_campaign(dict(META, run=2), SPECS)
+    store.append([result("apoa1", 8), result("stmv", 8)])
+
+    doc = export_json(store)
+    assert doc == {
+        "meta": dict(META, run=2),
+        "specs": SPECS,
+        "results": [result("apoa1", 8), result("stmv", 8)],
+    }
+    assert export_json(store, latest) == doc
+    assert len(export_json(store, "all")["results"]) == 3
+    assert export_json(open_store(tmp_path / "empty.jsonl"))["results"] == []
+
+
+def run_cli(monkeypatch, capsys, *args):
+    monkeypatch.setattr(sys, "argv", ["results_store.py", *map(str, args)])
+    results_store.main()
+    return capsys.readouterr().out
+
+
+def test_cli_list_query_export(tmp_path, monkeypatch, capsys):
+    store = open_store(tmp_path / "results.jsonl")
+    campaign_id = store.start_campaign(META, SPECS)
+    store.append([result("apoa1", 4, performance=0.5), result("stmv", 8)])
+
+    listed = run_cli(monkeypatch, capsys, "list", store.path)
+    assert campaign_id in listed and "NAMD2-CPU  2 results" in listed
+
+    queried = run_cli(monkeypatch, capsys, "query", store.path, "--job", "apoa1")
+    assert (
+        queried.count("\n") == 1 and "cores 4" in queried and "0.5 days/ns" in queried
+    )
+
+    exported = tmp_path / "results.json"
+    run_cli(monkeypatch, capsys, "export", store.path, "-o", exported)
+    assert json.loads(exported.read_text()) == export_json(store)
+    assert json.loads(run_cli(monkeypatch, capsys, "export", store.path)) == (
+        export_json(store)
+    )
@@ -0,0 +1,108 @@
+import sys
+from pathlib import Path
+
+from mdbench.engines import GromacsEngine
+from mdbench.runner import run_matrix, run_single, run_throughput
+
+
+def test_run_matrix_speedup_vs_cpu(stub_gromacs):
+    results = run_matrix(
+        stub_gromacs,
+        "PEP",
+        ["0"],
+        cores=1,
+        silent=True,
+        repeats=1,
+        log_dir="logs",
+        sample_interval=0,
+        thermal_interval=0,
+    )
+    baseline, *offloaded = results
+    assert baseline["gpu_index_used"] is None
+    assert baseline["performance"] == 10.0
+    assert baseline["speedup_vs_cpu"] == 1.0
+    assert len(offloaded) == 8  # pme, bonded and update on gpu or cpu, 1 rank
+    for result in offloaded:
+        assert result["gpu_index_used"] == "0"
+        assert result["nv_gpus_available"] is None
+        expected = 3.0 if result["launch_config"]["pme"] == "gpu" else 2.0
+        assert result["speedup_vs_cpu"] == expected
+
+
+def test_gmx_path_overrides_the_container(monkeypatch):
+    monkeypatch.setenv("GMX_PATH", "/opt/gromacs/bin/gmx")
+    engine = GromacsEngine()
+    assert engine.gmx == ["/opt/gromacs/bin/gmx"]
+    assert engine.version_args == ["--version"]
+    assert GromacsEngine(gmx="gromacs/gromacs-ngc.run gmx").gmx[1] == "gmx"
+
+
+def test_failing_job_stops_at_max_failures(stub_gromacs, tmp_path):
+    stub_gromacs.set_gmx(f"{sys.executable} -c 'raise SystemExit(1)'")
+    result = run_single(
+        stub_gromacs,
+        "PEP",
+        cores=1,
+        silent=True,
+        log_dir="logs",
+        sample_interval=0,
+        thermal_interval=0,
+        max_failures=2,
+    )
+    assert result["performance"] is None
+    assert [f["repeat"] for f in result["failed_repeats"]] == [0, 1]
+    assert result["stop_reason"] == "max_failures"
+
+
+def test_offload_space_fits_the_cores():
+    engine = GromacsEngine(gmx="gmx")
+    assert engine.offload_space(1, "0,1") == []  # 2 ranks can't share 1 core
+    two_ranks = engine.offload_space(2, "0,1")
+    assert len(two_ranks) == 8
+    assert all(c["ntmpi"] == 2 and c["gputasks"] == "01" for c in two_ranks)
+    assert {c.get("ntmpi", 1) for c in engine.offload_space(2, "0")} == {1, 2}
+
+
+def test_run_throughput_pins_disjoint_instances(stub_gromacs):
+    result = run_throughput(
+        stub_gromacs,
+        "PEP",
+        instances=2,
+        repeats=2,
+        cores=4,
+        silent=True,
+        log_dir="logs",
+        sample_interval=0,
+        thermal_interval=0,
+    )
+    assert result["cores_per_instance"] == 2
+    offsets = [c.split("-pinoffset ")[1].split()[0] for c in result["commandline"]]
+    assert offsets == ["0", "2"]
+    assert all("-ntomp 2" in c for c in result["commandline"])
+    assert result["instance_performance"] == [10.0, 10.0]
+    assert result["performance"] == 20.0
+    assert result["solo_performance"] == 10.0
+    assert result["slowdown_vs_solo"] == 1.0
+    assert len(list(Path("logs").glob("PEP-tp2x2-r*-i*.log"))) == 4
+
+
+def test_warmup_repeats_are_discarded(stub_gromacs):
+    result = run_single(
+        stub_gromacs,
+        "PEP",
+        cores=1,
+        repeats=2,
+        silent=True,
+        log_dir="logs",
+        sample_interval=0,
+        thermal_interval=0,
+        warmup=2,
+    )
+    assert result["warmup_repeats"] == 2
+    assert result["performance_samples"] == [10.0, 10.0]
+    assert sorted(p.name for p in Path("logs").glob("PEP-*.log")) == [
+        "PEP-ntomp1-r0.log",
+        "PEP-ntomp1-r1.log",
+        "PEP-ntomp1-w0.log",
+        "PEP-ntomp1-w1.log",
+    ]
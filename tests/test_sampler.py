@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from mdbench.capture import run_cmd_rtn_out
+from mdbench.sampler import PROC, ResourceSampler, summarize_resources, tree_pids
+
+# 64 MB held, one core spinning, and a sleeping child in the tree
+BUSY = """
+import subprocess, sys, time
+child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+ballast = bytearray(64 * 1024 * 1024)
+end = time.monotonic() + 1.0
+while time.monotonic() < end:
+    pass
+child.kill()
+"""
+
+linux_only = pytest.mark.skipif(not PROC.exists(), reason="needs /proc")
+
+
+@linux_only
+def test_samples_the_process_tree(tmp_path):
+    sampler = ResourceSampler(0.05, cores=2)
+    _, rtn_code = run_cmd_rtn_out(
+        [sys.executable, "-c", BUSY],
+        tmp_path / "busy.log",
+        echo=False,
+        monitors=[sampler],
+    )
+    assert rtn_code == 0
+    summary = sampler.summary()
+    assert summary["samples"] >= 5
+    assert len(sampler.rss_kb) == len(sampler.cpu_percent) == summary["samples"]
+    assert summary["peak_rss_mb"] >= 64
+    assert summary["mean_cpu_percent"] > 30
+    assert summary["max_threads"] >= 2  # parent and child
+    assert summary["busy_threads"] >= 1
+    assert 0 <= summary["idle_core_fraction"] <= 1
+    assert summary["user_time"] > 0.3  # rusage from os.wait4
+
+    combined = summarize_resources([summary, {**summary, "peak_rss_mb": 1.0}])
+    assert combined["peak_rss_mb"] == summary["peak_rss_mb"]
+    assert len(combined["repeats"]) == 2
+
+
+@linux_only
+def test_tree_pids_finds_children():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        time.sleep(0.1)
+        assert tree_pids(os.getpid())[:1] == [os.getpid()]
+        assert child.pid in tree_pids(os.getpid())
+    finally:
+        child.kill()
+        child.wait()
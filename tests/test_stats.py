@@ -0,0 +1,44 @@
+import pytest
+
+from mdbench.compare import INSUFFICIENT, compare_samples
+from mdbench.stats import bootstrap_ratio_ci, mann_whitney_min_p, mann_whitney_u
+
+
+def test_mann_whitney_exact():
+    u, p = mann_whitney_u([1, 2, 3, 4], [5, 6, 7, 8])
+    assert u == 0
+    assert p == pytest.approx(2 / 70)  # 1 of 70 orderings as extreme, two sided
+    assert mann_whitney_u([1, 3, 5], [2, 4, 6])[1] == pytest.approx(0.7)
+
+
+def test_mann_whitney_ties_use_normal_approximation():
+    u, p = mann_whitney_u([1, 1, 2, 2], [1, 1, 2, 2])
+    assert u == 8
+    assert p == 1.0
+
+
+def test_mann_whitney_min_p():
+    assert mann_whitney_min_p(3, 3) == pytest.approx(0.1)
+    assert mann_whitney_min_p(4, 4) == pytest.approx(2 / 70)
+    assert mann_whitney_min_p(3, 5) < 0.05 < mann_whitney_min_p(3, 4)
+
+
+def test_bootstrap_ratio_ci():
+    low, high = bootstrap_ratio_ci([10.0, 10.1, 9.9, 10.0], [20.0, 20.2, 19.8, 20.1])
+    assert 1.9 < low <= high < 2.1
+    assert bootstrap_ratio_ci([1, 2, 3], [1, 2, 3]) == bootstrap_ratio_ci(
+        [1, 2, 3], [1, 2, 3]
+    )  # seeded
+
+
+def test_compare_too_few_repeats_is_not_same():
+    row = compare_samples([40.1, 40.2, 40.3], [20.1, 20.2, 20.3], "ns/day")
+    assert row["verdict"] == INSUFFICIENT
+
+
+def test_compare_regression_and_lower_is_better():
+    base, slow = [40.1, 40.2, 40.3, 40.4], [20.1, 20.2, 20.3, 20.4]
+    assert compare_samples(base, slow, "ns/day")["verdict"] == "REGRESSION"
+    assert compare_samples(base, slow, "days/ns")["verdict"] == "faster"
+    same = compare_samples(base, [40.15, 40.25, 40.35, 40.05], "ns/day")
+    assert same["verdict"] == "same"
@@ -0,0 +1,54 @@
+import pytest
+
+from mdbench import thermal
+from mdbench.thermal import ThermalMonitor, ThrottleGuard
+
+# mean MHz of each repeat, the third and fourth throttled below 95%
+REPEATS = [{"mean_mhz": mhz} for mhz in (3000.0, 2990.0, 2500.0, 2000.0, 2980.0)]
+
+
+@pytest.mark.parametrize(
+    "action, verdicts",
+    [
+        ("flag", ["keep"] * 5),
+        ("exclude", ["keep", "keep", "exclude", "exclude", "keep"]),
+        ("rerun", ["keep", "keep", "rerun", "exclude", "keep"]),  # max_reruns=1
+    ],
+)
+def test_throttle_guard(action, verdicts):
+    guard = ThrottleGuard(fraction=0.95, action=action, max_reruns=1)
+    assert [guard.check(r) for r in REPEATS] == verdicts
+    summary = guard.summary()
+    assert summary["throttled_repeats"] == [2, 3]
+    assert summary["reference_mhz"] == 3000.0
+    assert summary["reruns"] == (1 if action == "rerun" else 0)
+
+
+def test_throttle_guard_without_frequencies():
+    guard = ThrottleGuard(action="exclude")
+    assert guard.check({"samples": 0}) == "keep"
+    assert guard.check({"mean_temp_c": 90.0}) == "keep"
+    assert guard.summary()["reference_mhz"] is None
+
+
+def test_thermal_monitor_reads_sysfs(tmp_path, monkeypatch):
+    cpu, zones = tmp_path / "cpu", tmp_path / "thermal"
+    for c, khz in [(0, 3000000), (1, 2000000), (2, 1000000)]:
+        (cpu / f"cpu{c}" / "cpufreq").mkdir(parents=True)
+        (cpu / f"cpu{c}" / "cpufreq" / "scaling_cur_freq").write_text(f"{khz}\n")
+    for z, milli_c in [(0, 45000), (1, 71500)]:
+        (zones / f"thermal_zone{z}").mkdir(parents=True)
+        (zones / f"thermal_zone{z}" / "temp").write_text(f"{milli_c}\n")
+    monkeypatch.setattr(thermal, "CPU", cpu)
+    monkeypatch.setattr(thermal, "THERMAL", zones)
+
+    monitor = ThermalMonitor(cpus=[0, 1], interval=60)
+    monitor.start(None)
+    monitor.stop()
+    assert monitor.summary() == {
+        "samples": 1,
+        "mean_mhz": 2500.0,  # cpu 2 is not in use
+        "min_mhz": 2500.0,
+        "mean_temp_c": 71.5,
+        "max_temp_c": 71.5,
+    }
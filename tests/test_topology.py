@@ -0,0 +1,44 @@
+import pytest
+
+from mdbench.topology import HwThread, Topology, format_cpulist, parse_cpulist
+
+
+@pytest.fixture
+def two_sockets():
+    """2 sockets x 2 cores x 2 SMT threads, siblings numbered as on Linux"""
+    threads = []
+    for socket in range(2):
+        for core in range(2):
+            for smt in range(2):
+                cpu = smt * 4 + socket * 2 + core
+                threads.append(HwThread(cpu, socket, core, socket, smt))
+    return Topology(threads)
+
+
+def test_cpulist_round_trip():
+    assert parse_cpulist("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+    assert format_cpulist([0, 1, 2, 3, 8, 10, 11]) == "0-3,8,10-11"
+
+
+def test_plan(two_sockets):
+    assert two_sockets.plan(4, "compact") == [0, 1, 4, 5]
+    assert two_sockets.plan(4, "scatter") == [0, 2, 1, 3]
+    assert two_sockets.plan(4, "physical") == [0, 1, 2, 3]
+    with pytest.raises(Exception):
+        two_sockets.plan(5, "physical")
+
+
+def test_gromacs_pin(two_sockets):
+    # mdrun order: socket, core, then SMT sibling, i.e. 0 4 1 5 2 6 3 7
+    assert two_sockets.gromacs_pin([0, 1, 2, 3]) == (
+        [],
+        "-pin on -pinoffset 0 -pinstride 2".split(),
+    )
+    assert two_sockets.gromacs_pin([2, 6, 3, 7]) == (
+        [],
+        "-pin on -pinoffset 4 -pinstride 1".split(),
+    )
+    assert two_sockets.gromacs_pin([0, 2, 4]) == (
+        ["taskset", "-c", "0,2,4"],
+        ["-pin", "off"],
+    )
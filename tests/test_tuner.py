@@ -0,0 +1,26 @@
+from mdbench.tuner import autotune, successive_halving
+
+
+def test_budget_stops_doubling_at_max():
+    runs = []
+
+    def evaluate(config, budget):
+        runs.append(budget)
+        return config
+
+    ranked, rounds = successive_halving(range(88), evaluate, 125, max_budget=500)
+    assert ranked[0] == (87, 87)
+    assert [r["budget"] for r in rounds] == [125, 250, 500, 500, 500, 500]
+    assert max(runs) == 500
+    assert sum(runs) == 88 * 125 + 44 * 250 + (22 + 11 + 5 + 2) * 500
+
+    _, rounds = successive_halving(range(8), evaluate, 3, max_budget=10)
+    assert [r["budget"] for r in rounds] == [3, 6, 10]
+
+
+def test_autotune_budget_from_production_steps(stub_gromacs):
+    entry = autotune(stub_gromacs, "PEP", cores=4, silent=True, log_dir="logs")
+    budgets = [r["budget"] for r in entry["rounds"]]
+    assert budgets[0] == 500 // 4  # PEP runs 500 steps
+    assert budgets[-1] == 500
+    assert budgets == sorted(budgets)